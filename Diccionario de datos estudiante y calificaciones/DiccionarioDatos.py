@@ -1,3 +1,12 @@
+import sys
+
+# si se pasa un archivo (o - para la entrada estandar) se usa el modo por lotes
+# de modoLote.py en lugar de preguntar los datos uno por uno
+if len(sys.argv) > 1:
+    from modoLote import main
+    main(sys.argv[1:])
+    sys.exit()
+
 # se declara la variable diccionario
 diccionario = {}
 
@@ -0,0 +1,157 @@
+"""Modo por lotes de DiccionarioDatos: estadisticas de un archivo de calificaciones.
+
+Lee lineas "nombre,calificacion" de un archivo (o de la entrada estandar
+con "-") en bloques, convierte las calificaciones de cada bloque de una
+vez con NumPy y combina las estadisticas del bloque con las acumuladas
+(la forma por bloques de Welford), asi que la memoria no depende del
+tamano del archivo. Con --por-estudiante tambien se guardan estadisticas
+por nombre, lo que ocupa memoria por cada estudiante distinto.
+
+    python DiccionarioDatos.py notas.csv
+    python DiccionarioDatos.py - --por-estudiante --progreso 1000000 < notas.csv
+"""
+import argparse
+import itertools
+import sys
+
+import numpy as np
+
+
+class Estadisticas:
+    __slots__ = ("cuenta", "media", "m2", "minimo", "maximo")
+
+    def __init__(self):
+        self.cuenta = 0
+        self.media = 0.0
+        self.m2 = 0.0  # suma de cuadrados de las diferencias con la media
+        self.minimo = float("inf")
+        self.maximo = float("-inf")
+
+    # junta las estadisticas de otro grupo de datos con las de este
+    def combinar(self, cuenta, media, m2, minimo, maximo):
+        if not cuenta:
+            return
+        total = self.cuenta + cuenta
+        diferencia = media - self.media
+        self.media += diferencia * cuenta / total
+        self.m2 += m2 + diferencia * diferencia * self.cuenta * cuenta / total
+        self.cuenta = total
+        self.minimo = min(self.minimo, minimo)
+        self.maximo = max(self.maximo, maximo)
+
+    def agregarBloque(self, calificaciones):
+        if len(calificaciones):
+            media = calificaciones.mean()
+            self.combinar(len(calificaciones), float(media),
+                          float(((calificaciones - media) ** 2).sum()),
+                          float(calificaciones.min()), float(calificaciones.max()))
+
+    @property
+    def varianza(self):
+        return self.m2 / self.cuenta if self.cuenta else float("nan")
+
+    @property
+    def desviacion(self):
+        return self.varianza ** 0.5
+
+    def resumen(self):
+        return (f"{self.cuenta} calificaciones, promedio {self.media:.2f}, "
+                f"desviacion {self.desviacion:.2f}, min {self.minimo:g}, max {self.maximo:g}")
+
+
+def _convertir(textos):
+    """Calificaciones como float64 y mascara de las validas (numeros finitos)."""
+    try:
+        calificaciones = np.array(textos, dtype=np.float64)
+    except ValueError:
+        # hay alguna linea mala: convertir una por una solo este bloque
+        calificaciones = np.empty(len(textos))
+        for i, texto in enumerate(textos):
+            try:
+                calificaciones[i] = float(texto)
+            except ValueError:
+                calificaciones[i] = np.nan
+    return calificaciones, np.isfinite(calificaciones)
+
+
+def _agregarPorEstudiante(por_estudiante, nombres, calificaciones):
+    unicos, grupo = np.unique(nombres, return_inverse=True)
+    cuentas = np.bincount(grupo)
+    medias = np.bincount(grupo, calificaciones) / cuentas
+    m2 = np.bincount(grupo, (calificaciones - medias[grupo]) ** 2)
+    orden = np.argsort(grupo, kind="stable")
+    inicios = np.concatenate(([0], np.cumsum(cuentas)[:-1]))
+    minimos = np.minimum.reduceat(calificaciones[orden], inicios)
+    maximos = np.maximum.reduceat(calificaciones[orden], inicios)
+    for i, nombre in enumerate(unicos.tolist()):
+        estadisticas = por_estudiante.get(nombre)
+        if estadisticas is None:
+            estadisticas = por_estudiante[nombre] = Estadisticas()
+        estadisticas.combinar(int(cuentas[i]), float(medias[i]), float(m2[i]),
+                              float(minimos[i]), float(maximos[i]))
+
+
+def procesar(archivo, separador=",", lineas_por_bloque=50_000, por_estudiante=None,
+             progreso=0, salida_progreso=sys.stderr):
+    """Devuelve (Estadisticas de todo el archivo, lineas descartadas).
+
+    Si se pasa un diccionario en por_estudiante, se llena con nombre -> Estadisticas.
+    """
+    total = Estadisticas()
+    descartadas = 0
+    siguiente_aviso = progreso
+    while True:
+        lineas = list(itertools.islice(archivo, lineas_por_bloque))
+        if not lineas:
+            break
+        # las lineas en blanco no cuentan ni como calificacion ni como descartadas
+        partes = [linea.rpartition(separador) for linea in lineas if not linea.isspace()]
+        # sin separador, rpartition deja todo en la calificacion: "nan" la marca como invalida
+        calificaciones, validas = _convertir([calificacion if encontrado else "nan"
+                                              for _, encontrado, calificacion in partes])
+        descartadas += len(partes) - int(validas.sum())
+        calificaciones = calificaciones[validas]
+        total.agregarBloque(calificaciones)
+
+        if por_estudiante is not None and len(calificaciones):
+            nombres = np.array([nombre.strip() for nombre, _, _ in partes])[validas]
+            _agregarPorEstudiante(por_estudiante, nombres, calificaciones)
+
+        if progreso and total.cuenta >= siguiente_aviso:
+            print(f"... {total.resumen()}", file=salida_progreso, flush=True)
+            siguiente_aviso = (total.cuenta // progreso + 1) * progreso
+    return total, descartadas
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(
+        prog="DiccionarioDatos.py",
+        description="Promedio, desviacion, minimo y maximo de un archivo 'nombre,calificacion'.")
+    parser.add_argument("archivo", help="archivo de calificaciones, o - para la entrada estandar")
+    parser.add_argument("--separador", default=",")
+    parser.add_argument("--por-estudiante", action="store_true",
+                        help="mostrar tambien las estadisticas de cada estudiante")
+    parser.add_argument("--progreso", type=int, default=0,
+                        help="mostrar el avance cada N calificaciones")
+    parser.add_argument("--bloque", type=int, default=50_000, help="lineas por bloque")
+    args = parser.parse_args(argumentos)
+
+    por_estudiante = {} if args.por_estudiante else None
+    if args.archivo == "-":
+        total, descartadas = procesar(sys.stdin, args.separador, args.bloque,
+                                      por_estudiante, args.progreso)
+    else:
+        with open(args.archivo, encoding="utf-8", errors="replace") as archivo:
+            total, descartadas = procesar(archivo, args.separador, args.bloque,
+                                          por_estudiante, args.progreso)
+
+    if por_estudiante:
+        for nombre, estadisticas in por_estudiante.items():
+            print(f"{nombre}: {estadisticas.resumen()}")
+    if total.cuenta:
+        print(f"Total: {total.resumen()}")
+        print(f"Promedio de calificaciones: {total.media:.2f}")
+    else:
+        print("No se encontro ninguna calificacion")
+    if descartadas:
+        print(f"Lineas descartadas (sin calificacion valida): {descartadas}")
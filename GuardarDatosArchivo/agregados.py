@@ -0,0 +1,59 @@
+"""Sumas y cuentas de calificaciones mantenidas al registrar.
+
+Se actualizan cada vez que se registra, reemplaza o borra un estudiante,
+asi que los promedios (por estudiante, por materia y general) se leen en
+O(1) en vez de recorrer todas las calificaciones.
+"""
+
+
+class Agregados:
+    def __init__(self):
+        self.suma_estudiante = {}
+        self.cuenta_estudiante = {}
+        self.suma_materia = {}
+        self.cuenta_materia = {}
+        self.suma_total = 0.0
+        self.cuenta_total = 0
+
+    def _sumar(self, materias, signo):
+        for materia, calificacion in materias.items():
+            suma = self.suma_materia.get(materia, 0.0) + signo * calificacion
+            cuenta = self.cuenta_materia.get(materia, 0) + signo
+            if cuenta:
+                self.suma_materia[materia] = suma
+                self.cuenta_materia[materia] = cuenta
+            else:
+                self.suma_materia.pop(materia, None)
+                self.cuenta_materia.pop(materia, None)
+            self.suma_total += signo * calificacion
+            self.cuenta_total += signo
+        if not self.cuenta_total:
+            # sin calificaciones no queda error de redondeo acumulado
+            self.suma_total = 0.0
+
+    # anteriores son las materias que tenia el estudiante (None si es nuevo);
+    # materias None significa que se borro
+    def registrar(self, nombre, materias, anteriores=None):
+        if anteriores is not None:
+            self._sumar(anteriores, -1)
+            del self.suma_estudiante[nombre]
+            del self.cuenta_estudiante[nombre]
+        if materias is not None:
+            self._sumar(materias, 1)
+            self.suma_estudiante[nombre] = sum(materias.values())
+            self.cuenta_estudiante[nombre] = len(materias)
+
+    def promedioEstudiante(self, nombre):
+        cuenta = self.cuenta_estudiante.get(nombre)
+        return self.suma_estudiante[nombre] / cuenta if cuenta else None
+
+    def promedioMateria(self, materia):
+        cuenta = self.cuenta_materia.get(materia)
+        return self.suma_materia[materia] / cuenta if cuenta else None
+
+    def promedioGeneral(self):
+        return self.suma_total / self.cuenta_total if self.cuenta_total else None
+
+    def promediosPorMateria(self):
+        return {materia: self.suma_materia[materia] / cuenta
+                for materia, cuenta in self.cuenta_materia.items()}
@@ -0,0 +1,306 @@
+"""Almacen de estudiantes con diario de solo-agregar y foto compactada.
+
+Cada registro se agrega como una linea JSON al diario (`<ruta>.diario`),
+asi que guardar un estudiante cuesta lo mismo sin importar cuantos haya.
+Al iniciar se carga la ultima foto (`<ruta>.json`) y se reproduce el
+diario encima. Cuando el diario pasa de `compactar_cada` registros se rota
+y un hilo escribe una foto nueva con el estado completo; la foto se
+reemplaza de forma atomica (archivo temporal y os.replace).
+
+`sync_cada` indica cada cuantos registros se hace fsync (1 = en cada
+registro, 0 = solo al compactar y al cerrar) y `sync_intervalo`, si se
+da, fuerza un fsync cuando pasaron esos segundos desde el anterior.
+
+Solo un proceso a la vez puede abrir el almacen: se toma un candado
+exclusivo sobre `<ruta>.lock` y, si otro proceso ya lo tiene, se lanza
+BlockingIOError en lugar de tocar sus archivos.
+"""
+import ast
+import json
+import os
+import threading
+import time
+from collections.abc import MutableMapping
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from agregados import Agregados
+
+
+# leer el archivo de versiones anteriores (un diccionario de Python escrito con str)
+def leerArchivo(archivo):
+    if not os.path.exists(archivo):
+        return {}
+    with open(archivo, "rb") as f:
+        contenido = f.read()
+    try:
+        texto = contenido.decode("utf-8")
+    except UnicodeDecodeError:
+        # guardado con la codificacion de Windows
+        texto = contenido.decode("latin-1")
+    return ast.literal_eval(texto) if texto.strip() else {}
+
+
+def _sincronizarCarpeta(ruta):
+    # en POSIX el rename solo es durable si tambien se sincroniza la carpeta
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(ruta)), os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _lineasDiario(ruta, estricto=True):
+    """(nombre, materias, bytes validos hasta aqui) por cada registro completo del diario.
+
+    Una ultima linea a medio escribir se descarta. Con `estricto`, una
+    linea mala seguida de mas datos es un diario corrupto (ValueError).
+    """
+    valido = 0
+    with open(ruta, "rb") as f:
+        for linea in f:
+            try:
+                if not linea.endswith(b"\n"):
+                    raise ValueError("linea incompleta")
+                registro = json.loads(linea)
+            except ValueError:
+                if estricto and f.read(1):
+                    raise ValueError(f"{ruta} esta corrupto despues del byte {valido}")
+                return
+            valido += len(linea)
+            yield registro["e"], registro["m"], valido
+
+
+def _inodos(rutas):
+    # cambian cuando una compactacion rota el diario o reemplaza la foto, no al agregar
+    inodos = []
+    for ruta in rutas:
+        try:
+            inodos.append(os.stat(ruta).st_ino)
+        except FileNotFoundError:
+            inodos.append(None)
+    return inodos
+
+
+def leerAlmacen(ruta, legado=None):
+    """Estado actual del almacen (nombre -> materias) sin escribir ni tomar el candado.
+
+    Sirve aunque otro proceso lo tenga abierto: no migra el legado, no
+    termina compactaciones ni recorta el diario. Si una compactacion rota
+    el diario o cambia la foto mientras se lee, se vuelve a leer.
+    """
+    foto, rotado, diario = ruta + ".json", ruta + ".diario.1", ruta + ".diario"
+    while True:
+        antes = _inodos((foto, rotado, diario))
+        datos = {}
+        try:
+            if antes[0] is not None:
+                with open(foto, encoding="utf-8") as f:
+                    datos = json.load(f)
+            elif legado is not None:
+                datos = leerArchivo(legado)
+            for archivo, inodo in ((rotado, antes[1]), (diario, antes[2])):
+                if inodo is None:
+                    continue
+                # el dueno puede estar agregando: una linea a medias es el final
+                for nombre, materias, _ in _lineasDiario(archivo, estricto=False):
+                    if materias is None:
+                        datos.pop(nombre, None)
+                    else:
+                        datos[nombre] = materias
+        except FileNotFoundError:
+            # la compactacion termino y borro el diario rotado antes de abrirlo
+            continue
+        if _inodos((foto, rotado, diario)) == antes:
+            return datos
+
+
+def _bloquear(ruta):
+    """Abre `ruta` y toma un candado exclusivo sin esperar; devuelve el archivo abierto."""
+    candado = open(ruta, "a+b")
+    try:
+        if fcntl is not None:
+            fcntl.flock(candado.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            candado.seek(0)
+            msvcrt.locking(candado.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        candado.close()
+        raise BlockingIOError(f"el almacen ya esta abierto en otro proceso ({ruta})") from None
+    return candado
+
+
+class AlmacenDiario(MutableMapping):
+    def __init__(self, ruta, legado=None, sync_cada=1, sync_intervalo=None, compactar_cada=10000):
+        # el candado va primero: recuperar una compactacion o recortar el diario
+        # solo es seguro si ningun otro proceso los esta escribiendo
+        self._candado = _bloquear(ruta + ".lock")
+        try:
+            self._abrir(ruta, legado, sync_cada, sync_intervalo, compactar_cada)
+        except BaseException:
+            self._candado.close()
+            raise
+
+    def _abrir(self, ruta, legado, sync_cada, sync_intervalo, compactar_cada):
+        self.ruta_foto = ruta + ".json"
+        self.ruta_diario = ruta + ".diario"
+        self.ruta_rotado = ruta + ".diario.1"
+        self.sync_cada = sync_cada
+        self.sync_intervalo = sync_intervalo
+        self.compactar_cada = compactar_cada
+
+        self.datos = {}
+        self.agregados = Agregados()
+        self.registros_diario = 0
+        self._pendientes = 0
+        self._ultimo_sync = time.monotonic()
+        self._lock = threading.RLock()
+        self._compactacion = None
+
+        if os.path.exists(self.ruta_foto):
+            with open(self.ruta_foto, encoding="utf-8") as f:
+                for nombre, materias in json.load(f).items():
+                    self._aplicar(nombre, materias)
+        elif legado is not None and os.path.exists(legado):
+            for nombre, materias in leerArchivo(legado).items():
+                self._aplicar(nombre, materias)
+            self._escribirFoto(dict(self.datos))
+
+        rotado = os.path.exists(self.ruta_rotado)
+        if rotado:
+            self._reproducir(self.ruta_rotado)
+        self._reproducir(self.ruta_diario)
+        if rotado:
+            # se corto una compactacion: la foto nueva ya incluye los dos diarios
+            self._escribirFoto(dict(self.datos))
+            os.remove(self.ruta_rotado)
+            open(self.ruta_diario, "wb").close()
+            self.registros_diario = 0
+        self._diario = open(self.ruta_diario, "ab")
+
+    def _aplicar(self, nombre, materias):
+        self.agregados.registrar(nombre, materias, self.datos.get(nombre))
+        if materias is None:
+            self.datos.pop(nombre, None)
+        else:
+            self.datos[nombre] = materias
+
+    def _reproducir(self, ruta):
+        if not os.path.exists(ruta):
+            return
+        valido = 0
+        for nombre, materias, valido in _lineasDiario(ruta):
+            self._aplicar(nombre, materias)
+            if ruta == self.ruta_diario:
+                self.registros_diario += 1
+        if valido < os.path.getsize(ruta):
+            with open(ruta, "r+b") as f:
+                f.truncate(valido)
+
+    def _escribirFoto(self, datos):
+        temporal = self.ruta_foto + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(datos, f, ensure_ascii=False, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporal, self.ruta_foto)
+        _sincronizarCarpeta(self.ruta_foto)
+
+    def _sync(self):
+        self._diario.flush()
+        os.fsync(self._diario.fileno())
+        self._pendientes = 0
+        self._ultimo_sync = time.monotonic()
+
+    # agrega varios registros con una sola escritura (y como mucho un fsync)
+    def actualizarLote(self, registros):
+        self.aplicarLote(self.escribirLote(registros))
+
+    # solo los escribe en el diario; devuelve los registros para aplicarLote
+    def escribirLote(self, registros):
+        registros = [(nombre, None if materias is None else dict(materias))
+                     for nombre, materias in registros]
+        if not registros:
+            return registros
+        lineas = b"".join(
+            json.dumps({"e": nombre, "m": materias}, ensure_ascii=False,
+                       separators=(",", ":")).encode("utf-8") + b"\n"
+            for nombre, materias in registros)
+        with self._lock:
+            self._diario.write(lineas)
+            self._diario.flush()
+            self._pendientes += len(registros)
+            self.registros_diario += len(registros)
+
+            if self.sync_cada and self._pendientes >= self.sync_cada:
+                self._sync()
+            elif (self.sync_intervalo is not None
+                  and time.monotonic() - self._ultimo_sync >= self.sync_intervalo):
+                self._sync()
+        return registros
+
+    # hace visibles los registros ya escritos con escribirLote
+    def aplicarLote(self, registros):
+        with self._lock:
+            for nombre, materias in registros:
+                self._aplicar(nombre, materias)
+            if self.registros_diario >= self.compactar_cada:
+                self.compactar()
+
+    # pasa el diario a una foto nueva en segundo plano
+    def compactar(self, esperar=False):
+        with self._lock:
+            if self._compactacion is not None and self._compactacion.is_alive():
+                if esperar:
+                    self._compactacion.join()
+                return
+            if os.path.exists(self.ruta_rotado):
+                # la foto anterior no se pudo escribir: no pisar su diario
+                return
+            self._sync()
+            self._diario.close()
+            os.replace(self.ruta_diario, self.ruta_rotado)
+            self._diario = open(self.ruta_diario, "ab")
+            self.registros_diario = 0
+            # los valores no se modifican despues de guardarse, basta una copia superficial
+            foto = dict(self.datos)
+            self._compactacion = threading.Thread(target=self._terminarCompactacion,
+                                                  args=(foto,), daemon=True)
+            self._compactacion.start()
+        if esperar:
+            self._compactacion.join()
+
+    def _terminarCompactacion(self, foto):
+        self._escribirFoto(foto)
+        os.remove(self.ruta_rotado)
+
+    def cerrar(self):
+        with self._lock:
+            if self._compactacion is not None:
+                self._compactacion.join()
+            self._sync()
+            self._diario.close()
+            self._candado.close()
+
+    def __getitem__(self, nombre):
+        return self.datos[nombre]
+
+    def __setitem__(self, nombre, materias):
+        self.actualizarLote([(nombre, materias)])
+
+    def __delitem__(self, nombre):
+        if nombre not in self.datos:
+            raise KeyError(nombre)
+        self.actualizarLote([(nombre, None)])
+
+    def __iter__(self):
+        return iter(self.datos)
+
+    def __len__(self):
+        return len(self.datos)
@@ -0,0 +1,182 @@
+"""Almacen de estudiantes en SQLite, con las mismas operaciones que AlmacenDiario.
+
+Los datos viven en tres tablas (estudiantes, materias y calificaciones)
+con indices por nombre de estudiante y por materia, asi que buscar un
+estudiante o promediar una materia no necesita cargar todo en memoria.
+La base usa WAL y cada lote de registros va en una sola transaccion.
+
+    python almacenSQLite.py archivo.txt estudiantes.db   # migrar
+"""
+import os
+import sqlite3
+import sys
+from collections.abc import MutableMapping
+
+from almacenDiario import leerArchivo
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS estudiantes (
+    id INTEGER PRIMARY KEY,
+    nombre TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS materias (
+    id INTEGER PRIMARY KEY,
+    nombre TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS calificaciones (
+    estudiante INTEGER NOT NULL REFERENCES estudiantes(id) ON DELETE CASCADE,
+    materia INTEGER NOT NULL REFERENCES materias(id),
+    calificacion REAL NOT NULL,
+    PRIMARY KEY (estudiante, materia)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS calificaciones_materia ON calificaciones(materia);
+"""
+
+
+class AgregadosSQLite:
+    """Los mismos promedios que Agregados, calculados por la base."""
+
+    def __init__(self, conexion):
+        self.conexion = conexion
+
+    def _valor(self, consulta, parametros=()):
+        return self.conexion.execute(consulta, parametros).fetchone()[0]
+
+    def promedioEstudiante(self, nombre):
+        return self._valor(
+            "SELECT AVG(c.calificacion) FROM estudiantes e "
+            "JOIN calificaciones c ON c.estudiante = e.id WHERE e.nombre = ?", (nombre,))
+
+    def promedioMateria(self, materia):
+        return self._valor(
+            "SELECT AVG(c.calificacion) FROM materias m "
+            "JOIN calificaciones c ON c.materia = m.id WHERE m.nombre = ?", (materia,))
+
+    def promedioGeneral(self):
+        return self._valor("SELECT AVG(calificacion) FROM calificaciones")
+
+    def promediosPorMateria(self):
+        return dict(self.conexion.execute(
+            "SELECT m.nombre, AVG(c.calificacion) FROM calificaciones c "
+            "JOIN materias m ON m.id = c.materia GROUP BY c.materia"))
+
+
+class AlmacenSQLite(MutableMapping):
+    def __init__(self, ruta, legado=None):
+        nueva = not os.path.exists(ruta)
+        self.conexion = sqlite3.connect(ruta)
+        self.conexion.execute("PRAGMA journal_mode=WAL")
+        # con WAL, NORMAL no puede corromper la base; solo arriesga la ultima transaccion
+        self.conexion.execute("PRAGMA synchronous=NORMAL")
+        self.conexion.execute("PRAGMA foreign_keys=ON")
+        self.conexion.executescript(ESQUEMA)
+        self.agregados = AgregadosSQLite(self.conexion)
+        # nombre -> id de las materias ya conocidas
+        self._materias = {}
+        if nueva and legado is not None and os.path.exists(legado):
+            self.actualizarLote(leerArchivo(legado).items())
+
+    def _idEstudiante(self, nombre):
+        fila = self.conexion.execute(
+            "SELECT id FROM estudiantes WHERE nombre = ?", (nombre,)).fetchone()
+        return None if fila is None else fila[0]
+
+    def _idMateria(self, cursor, materia):
+        if materia not in self._materias:
+            cursor.execute("INSERT OR IGNORE INTO materias (nombre) VALUES (?)", (materia,))
+            self._materias[materia] = cursor.execute(
+                "SELECT id FROM materias WHERE nombre = ?", (materia,)).fetchone()[0]
+        return self._materias[materia]
+
+    # registra o reemplaza (materias None borra) todos los estudiantes en una transaccion
+    def actualizarLote(self, registros):
+        # las calificaciones se insertan al final, asi que solo cuenta el ultimo registro de cada nombre
+        registros = dict(registros)
+        filas = []
+        try:
+            with self.conexion:
+                cursor = self.conexion.cursor()
+                for nombre, materias in registros.items():
+                    if materias is None:
+                        cursor.execute("DELETE FROM estudiantes WHERE nombre = ?", (nombre,))
+                        continue
+                    cursor.execute("INSERT OR IGNORE INTO estudiantes (nombre) VALUES (?)", (nombre,))
+                    if cursor.rowcount == 1:
+                        estudiante = cursor.lastrowid
+                    else:
+                        estudiante = self._idEstudiante(nombre)
+                        cursor.execute("DELETE FROM calificaciones WHERE estudiante = ?", (estudiante,))
+                    filas.extend((estudiante, self._idMateria(cursor, materia), calificacion)
+                                 for materia, calificacion in materias.items())
+                cursor.executemany(
+                    "INSERT INTO calificaciones (estudiante, materia, calificacion) "
+                    "VALUES (?, ?, ?)", filas)
+        except sqlite3.Error:
+            # la transaccion se deshizo: los ids guardados pueden no existir
+            self._materias.clear()
+            raise
+
+    def cerrar(self):
+        self.conexion.close()
+
+    def __getitem__(self, nombre):
+        estudiante = self._idEstudiante(nombre)
+        if estudiante is None:
+            raise KeyError(nombre)
+        return dict(self.conexion.execute(
+            "SELECT m.nombre, c.calificacion FROM calificaciones c "
+            "JOIN materias m ON m.id = c.materia WHERE c.estudiante = ?", (estudiante,)))
+
+    def __setitem__(self, nombre, materias):
+        self.actualizarLote([(nombre, materias)])
+
+    def __delitem__(self, nombre):
+        if self._idEstudiante(nombre) is None:
+            raise KeyError(nombre)
+        self.actualizarLote([(nombre, None)])
+
+    def __contains__(self, nombre):
+        return self._idEstudiante(nombre) is not None
+
+    def __iter__(self):
+        for (nombre,) in self.conexion.execute("SELECT nombre FROM estudiantes ORDER BY id"):
+            yield nombre
+
+    def __len__(self):
+        return self.conexion.execute("SELECT COUNT(*) FROM estudiantes").fetchone()[0]
+
+    def __bool__(self):
+        return bool(self.conexion.execute("SELECT EXISTS (SELECT 1 FROM estudiantes)").fetchone()[0])
+
+    def items(self):
+        # una sola consulta recorrida en orden, sin cargar todos los estudiantes
+        consulta = self.conexion.execute(
+            "SELECT e.id, e.nombre, m.nombre, c.calificacion FROM estudiantes e "
+            "LEFT JOIN calificaciones c ON c.estudiante = e.id "
+            "LEFT JOIN materias m ON m.id = c.materia ORDER BY e.id")
+        actual, nombre, materias = None, None, {}
+        for estudiante, nombre_fila, materia, calificacion in consulta:
+            if estudiante != actual:
+                if actual is not None:
+                    yield nombre, materias
+                actual, nombre, materias = estudiante, nombre_fila, {}
+            if materia is not None:
+                materias[materia] = calificacion
+        if actual is not None:
+            yield nombre, materias
+
+    def values(self):
+        for _, materias in self.items():
+            yield materias
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Uso: python almacenSQLite.py archivo.txt estudiantes.db")
+        sys.exit(1)
+    origen, destino = sys.argv[1:]
+    datos = leerArchivo(origen)
+    almacen = AlmacenSQLite(destino)
+    almacen.actualizarLote(datos.items())
+    print(f"{len(datos)} estudiantes migrados a {destino} ({len(almacen)} en total)")
+    almacen.cerrar()
@@ -0,0 +1,178 @@
+"""Consultas sobre las calificaciones en forma de columnas de NumPy.
+
+TablaCalificaciones convierte el almacen (nombre -> {materia: calificacion})
+en tres arreglos paralelos: id de estudiante, id de materia y calificacion.
+Los nombres se normalizan (espacios y mayusculas) antes de asignarles un
+id, asi que "juan" y "Juan " son el mismo estudiante. Los reportes usan
+agrupaciones con np.bincount, np.argpartition para los mejores N y un
+ordenamiento por materia (y luego por calificacion dentro de cada una)
+que comparten los percentiles y los minimos y maximos.
+
+    python consultas.py --mejores 10
+    python consultas.py --materia fisica --debajo 60
+"""
+import argparse
+
+import numpy as np
+
+from almacenDiario import leerAlmacen
+
+
+# "  Juan " y "juan" se guardan igual
+def normalizar(texto):
+    return " ".join(str(texto).split()).casefold()
+
+
+class TablaCalificaciones:
+    def __init__(self, estudiantes, materias, id_estudiante, id_materia, calificacion):
+        self.estudiantes = estudiantes
+        self.materias = materias
+        self.indice_materia = {materia: i for i, materia in enumerate(materias)}
+        self.id_estudiante = id_estudiante
+        self.id_materia = id_materia
+        self.calificacion = calificacion
+        self._orden = None
+
+    @classmethod
+    def desde(cls, almacen):
+        ids_estudiante = {}
+        ids_materia = {}
+        filas_estudiante, filas_materia, calificaciones = [], [], []
+        for nombre, materias in almacen.items():
+            estudiante = ids_estudiante.setdefault(normalizar(nombre), len(ids_estudiante))
+            for materia, calificacion in materias.items():
+                filas_estudiante.append(estudiante)
+                filas_materia.append(ids_materia.setdefault(normalizar(materia), len(ids_materia)))
+                calificaciones.append(calificacion)
+        return cls(
+            list(ids_estudiante), list(ids_materia),
+            np.array(filas_estudiante, dtype=np.int64),
+            np.array(filas_materia, dtype=np.int64),
+            np.array(calificaciones, dtype=np.float64),
+        )
+
+    def __len__(self):
+        return len(self.calificacion)
+
+    def _id_materia(self, materia):
+        try:
+            return self.indice_materia[normalizar(materia)]
+        except KeyError:
+            raise KeyError(f"no hay calificaciones de {materia!r}") from None
+
+    def promediosEstudiantes(self):
+        """Promedio de cada estudiante, en el orden de self.estudiantes (NaN si no tiene)."""
+        total = len(self.estudiantes)
+        suma = np.bincount(self.id_estudiante, self.calificacion, minlength=total)
+        cuenta = np.bincount(self.id_estudiante, minlength=total)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return suma / cuenta
+
+    def mejores(self, n=10):
+        """Los n mejores promedios, de mayor a menor, como (nombre, promedio)."""
+        promedios = self.promediosEstudiantes()
+        validos = np.flatnonzero(~np.isnan(promedios))
+        n = min(max(n, 0), len(validos))
+        if n == 0:
+            return []
+        candidatos = validos[np.argpartition(-promedios[validos], n - 1)[:n]]
+        candidatos = candidatos[np.argsort(-promedios[candidatos], kind="stable")]
+        return [(self.estudiantes[i], float(promedios[i])) for i in candidatos]
+
+    def _ordenado(self):
+        # calificaciones ordenadas por (materia, calificacion) e inicio de cada materia
+        if self._orden is None:
+            materias = self.id_materia
+            if len(self.materias) <= np.iinfo(np.uint16).max:
+                # con claves de 16 bits el ordenamiento estable es radix
+                materias = materias.astype(np.uint16)
+            valores = self.calificacion[np.argsort(materias, kind="stable")]
+            cuenta = np.bincount(self.id_materia, minlength=len(self.materias))
+            inicio = np.concatenate(([0], np.cumsum(cuenta)[:-1]))
+            for desde, total in zip(inicio, cuenta):
+                valores[desde:desde + total].sort()
+            self._orden = (valores, inicio, cuenta)
+        return self._orden
+
+    def percentilesPorMateria(self, percentiles=(25, 50, 75, 90)):
+        """{materia: arreglo de percentiles}, interpolando igual que np.percentile."""
+        valores, inicio, cuenta = self._ordenado()
+        q = np.asarray(percentiles, dtype=np.float64) / 100
+        posicion = inicio[:, np.newaxis] + q * (cuenta[:, np.newaxis] - 1)
+        bajo = np.floor(posicion).astype(np.int64)
+        alto = np.minimum(bajo + 1, (inicio + cuenta - 1)[:, np.newaxis])
+        peso = posicion - bajo
+        resultado = valores[bajo] * (1 - peso) + valores[alto] * peso
+        return {materia: resultado[i] for i, materia in enumerate(self.materias)}
+
+    def estadisticasMaterias(self):
+        """{materia: dict con cuenta, promedio, desviacion, minimo y maximo}."""
+        valores, inicio, cuenta = self._ordenado()
+        suma = np.bincount(self.id_materia, self.calificacion, minlength=len(self.materias))
+        cuadrados = np.bincount(self.id_materia, self.calificacion ** 2,
+                                minlength=len(self.materias))
+        promedio = suma / cuenta
+        desviacion = np.sqrt(np.maximum(cuadrados / cuenta - promedio ** 2, 0))
+        return {
+            materia: {
+                "cuenta": int(cuenta[i]),
+                "promedio": float(promedio[i]),
+                "desviacion": float(desviacion[i]),
+                "minimo": float(valores[inicio[i]]),
+                "maximo": float(valores[inicio[i] + cuenta[i] - 1]),
+            }
+            for i, materia in enumerate(self.materias)
+        }
+
+    def histograma(self, materia, intervalos=10, rango=(0, 100)):
+        """(cuentas, bordes) de las calificaciones de una materia."""
+        mascara = self.id_materia == self._id_materia(materia)
+        return np.histogram(self.calificacion[mascara], bins=intervalos, range=rango)
+
+    def porDebajo(self, materia, umbral):
+        """Estudiantes con alguna calificacion menor que umbral en la materia."""
+        mascara = (self.id_materia == self._id_materia(materia)) & (self.calificacion < umbral)
+        return [self.estudiantes[i] for i in np.unique(self.id_estudiante[mascara])]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reportes de calificaciones.")
+    parser.add_argument("--datos", default="estudiantes", help="ruta del almacen (sin extension)")
+    parser.add_argument("--mejores", type=int, default=10, help="cuantos mejores promedios mostrar")
+    parser.add_argument("--materia", help="materia para el histograma y el filtro")
+    parser.add_argument("--debajo", type=float, help="listar quienes tienen menos que esto en --materia")
+    args = parser.parse_args()
+
+    # solo lectura: funciona aunque guardarDatos.py o el servidor tengan el almacen abierto
+    tabla = TablaCalificaciones.desde(leerAlmacen(args.datos, legado="archivo.txt"))
+    if not len(tabla):
+        print("No hay calificaciones registradas.")
+        return
+
+    if args.mejores > 0:
+        print(f"Mejores {args.mejores} promedios:")
+        for nombre, promedio in tabla.mejores(args.mejores):
+            print(f"  {nombre}: {promedio:.2f}")
+        print()
+
+    print("Por materia (cuenta, promedio, p25 / p50 / p75 / p90):")
+    percentiles = tabla.percentilesPorMateria()
+    for materia, datos in sorted(tabla.estadisticasMaterias().items()):
+        cuantiles = " / ".join(f"{valor:.1f}" for valor in percentiles[materia])
+        print(f"  {materia}: {datos['cuenta']}, {datos['promedio']:.2f}, {cuantiles}")
+
+    if args.materia:
+        if normalizar(args.materia) not in tabla.indice_materia:
+            print(f"\nNo hay calificaciones de {args.materia}.")
+            return
+        cuentas, bordes = tabla.histograma(args.materia)
+        print(f"\nHistograma de {args.materia}:")
+        for cuenta, desde, hasta in zip(cuentas, bordes[:-1], bordes[1:]):
+            print(f"  {desde:5.1f}-{hasta:5.1f}: {cuenta}")
+        if args.debajo is not None:
+            debajo = tabla.porDebajo(args.materia, args.debajo)
+            print(f"\nCon menos de {args.debajo:g} en {args.materia}: {', '.join(debajo) or 'nadie'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Generador de carga para servidor.py: peticiones por segundo y latencias.
+
+Abre --clientes conexiones; cada una manda --peticiones peticiones, una
+tras otra, mezclando registros (--escrituras es la fraccion) con
+consultas de un estudiante y del promedio general.
+
+    python generadorCarga.py --clientes 100 --peticiones 500 --escrituras 0.5
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import numpy as np
+
+MATERIAS = ["matematicas", "fisica", "quimica", "historia", "arte"]
+
+
+async def _conectar(args):
+    if args.unix:
+        return await asyncio.open_unix_connection(args.unix)
+    return await asyncio.open_connection(args.host, args.port)
+
+
+async def _cliente(numero, args, latencias, errores):
+    rng = random.Random(numero)
+    lector, escritor = await _conectar(args)
+    try:
+        for i in range(args.peticiones):
+            if rng.random() < args.escrituras:
+                peticion = {
+                    "op": "registrar",
+                    "nombre": f"carga{numero}_{i}",
+                    "materias": {materia: round(rng.uniform(0, 100), 1)
+                                 for materia in rng.sample(MATERIAS, 3)},
+                }
+            elif rng.random() < 0.5 and i:
+                peticion = {"op": "mostrar", "nombre": f"carga{numero}_{rng.randrange(i)}"}
+            else:
+                peticion = {"op": "promedio"}
+
+            inicio = time.perf_counter()
+            escritor.write(json.dumps(peticion).encode("utf-8") + b"\n")
+            await escritor.drain()
+            respuesta = json.loads(await lector.readline())
+            latencias.append(time.perf_counter() - inicio)
+            # consultar un nombre que no se registro (era una lectura) no es un error del servidor
+            if not respuesta["ok"] and peticion["op"] != "mostrar":
+                errores.append(respuesta["error"])
+    finally:
+        escritor.close()
+
+
+async def generar(args):
+    latencias, errores = [], []
+    inicio = time.perf_counter()
+    await asyncio.gather(*(_cliente(numero, args, latencias, errores)
+                           for numero in range(args.clientes)))
+    return latencias, errores, time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mide el servidor de estudiantes.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="socket Unix del servidor")
+    parser.add_argument("--clientes", type=int, default=50)
+    parser.add_argument("--peticiones", type=int, default=200, help="peticiones por cliente")
+    parser.add_argument("--escrituras", type=float, default=0.5, help="fraccion de registros")
+    args = parser.parse_args()
+
+    latencias, errores, duracion = asyncio.run(generar(args))
+    milisegundos = np.array(latencias) * 1000
+    p50, p95, p99 = np.percentile(milisegundos, (50, 95, 99))
+    print(f"{len(latencias)} peticiones en {duracion:.2f} s: {len(latencias) / duracion:.0f} por segundo")
+    print(f"latencia p50 {p50:.2f} ms, p95 {p95:.2f} ms, p99 {p99:.2f} ms, max {milisegundos.max():.2f} ms")
+    if errores:
+        print(f"{len(errores)} errores, por ejemplo: {errores[0]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,7 @@
-import os  
+import sys
 
-# leer datos del archivo
-def leerArchivo(archivo):
-    if os.path.exists(archivo):
-        with open(archivo, "r") as archivo:
-            contenido = archivo.read()
-            return eval(contenido) if contenido else {}
-    return {}
-
-# guardar datos en el archivo
-def guardarArchivo(archivo, datos):
-    with open(archivo, "w") as archivo:
-        archivo.write(str(datos))
+from almacenDiario import AlmacenDiario
+from almacenSQLite import AlmacenSQLite
 
 #registrar estudiantes
 def registrarEstudiante(diccionario):
@@ -38,43 +28,67 @@ def mostrarEstudiantes(diccionario):
         print(f"Estudiante: {estudiante}")
         for materia, calificacion in materias.items():
             print(f"  {materia}: {calificacion}")
-        promedio = sum(materias.values()) / len(materias)
-        print(f"  Promedio: {promedio:.2f}")
+        promedio = diccionario.agregados.promedioEstudiante(estudiante)
+        if promedio is None:
+            print("  Sin calificaciones")
+        else:
+            print(f"  Promedio: {promedio:.2f}")
 
 # calcular el promedio general
 def promedioGeneral(diccionario):
     if not diccionario:
         print("No hay estudiantes registrados.")
         return
-    total_calificaciones = 0
-    total_materias = 0
-    for materias in diccionario.values():
-        total_calificaciones += sum(materias.values())
-        total_materias += len(materias)
-    promedio = total_calificaciones / total_materias
+    promedio = diccionario.agregados.promedioGeneral()
+    if promedio is None:
+        print("No hay calificaciones registradas.")
+        return
     print(f"Promedio general de todos los estudiantes: {promedio:.2f}")
 
-# Archivo para guardar los datos
-archivo = "archivo.txt"
-estudiantes = leerArchivo(archivo)
-# Ciclo principal
-while True:
-    print("\nGestión de Estudiantes")
-    print("1. Registrar estudiante")
-    print("2. Mostrar estudiantes y sus calificaciones")
-    print("3. Calcular promedio general")
-    print("4. Salir")
-    opcion = input("Seleccione una opción: ")
+# calcular el promedio de cada materia
+def promedioPorMateria(diccionario):
+    promedios = diccionario.agregados.promediosPorMateria()
+    if not promedios:
+        print("No hay calificaciones registradas.")
+        return
+    for materia, promedio in sorted(promedios.items()):
+        print(f"  {materia}: {promedio:.2f}")
 
-    if opcion == "1":
-        registrarEstudiante(estudiantes)
-    elif opcion == "2":
-        mostrarEstudiantes(estudiantes)
-    elif opcion == "3":
-        promedioGeneral(estudiantes)
-    elif opcion == "4":
-        guardarArchivo(archivo, estudiantes)
-        print("Datos guardados. Hasta luego.")
-        break
+if __name__ == "__main__":
+    # Los datos van a un diario (o a SQLite con --sqlite); el archivo de
+    # versiones anteriores se migra la primera vez
+    archivo = "archivo.txt"
+    if "--sqlite" in sys.argv:
+        estudiantes = AlmacenSQLite("estudiantes.db", legado=archivo)
     else:
-        print("Por favor, selecciona una opción válida.")
+        try:
+            estudiantes = AlmacenDiario("estudiantes", legado=archivo)
+        except BlockingIOError:
+            # dos procesos sobre el mismo diario se pisarian los registros
+            print("Los datos ya estan abiertos en otro programa (¿esta corriendo servidor.py?).")
+            print("Cierra ese programa o registra los estudiantes a traves del servidor.")
+            sys.exit(1)
+    # Ciclo principal
+    while True:
+        print("\nGestión de Estudiantes")
+        print("1. Registrar estudiante")
+        print("2. Mostrar estudiantes y sus calificaciones")
+        print("3. Calcular promedio general")
+        print("4. Calcular promedio por materia")
+        print("5. Salir")
+        opcion = input("Seleccione una opción: ")
+
+        if opcion == "1":
+            registrarEstudiante(estudiantes)
+        elif opcion == "2":
+            mostrarEstudiantes(estudiantes)
+        elif opcion == "3":
+            promedioGeneral(estudiantes)
+        elif opcion == "4":
+            promedioPorMateria(estudiantes)
+        elif opcion == "5":
+            estudiantes.cerrar()
+            print("Datos guardados. Hasta luego.")
+            break
+        else:
+            print("Por favor, selecciona una opción válida.")
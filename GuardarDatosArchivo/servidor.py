@@ -0,0 +1,163 @@
+"""Servidor asyncio para registrar y consultar estudiantes desde varios clientes.
+
+Cada peticion es una linea JSON y cada respuesta tambien:
+
+    {"op": "registrar", "nombre": "ana", "materias": {"fisica": 90}}
+    {"op": "mostrar"}                      todos los estudiantes
+    {"op": "mostrar", "nombre": "ana"}     uno, con su promedio
+    {"op": "promedio"}                     general
+    {"op": "promedio", "materia": "fisica"}
+
+Las lecturas se responden desde la memoria del almacen. Las escrituras
+van a una cola y una sola tarea las junta en lotes: mientras se hace el
+fsync de un lote se acumulan las siguientes, y cada lote se escribe al
+diario con una escritura y un fsync. Un registro se confirma al cliente
+solo despues de que su lote esta en disco.
+
+El servidor es el unico dueno del almacen mientras corre (AlmacenDiario
+toma un candado); guardarDatos.py no arranca sobre el mismo almacen y
+consultas.py lo lee sin escribir.
+
+    python servidor.py --port 8765
+    python servidor.py --unix /tmp/estudiantes.sock
+"""
+import argparse
+import asyncio
+import json
+import signal
+
+from almacenDiario import AlmacenDiario
+
+MAX_LOTE = 1000
+
+
+class Servidor:
+    def __init__(self, almacen, max_lote=MAX_LOTE):
+        self.almacen = almacen
+        self.max_lote = max_lote
+        self.cola = asyncio.Queue()
+
+    async def escritor(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            lote = [await self.cola.get()]
+            while len(lote) < self.max_lote and not self.cola.empty():
+                lote.append(self.cola.get_nowait())
+            registros = [(nombre, materias) for nombre, materias, _ in lote]
+            try:
+                # la escritura y el fsync van en otro hilo; aplicar, en el del loop
+                registros = await loop.run_in_executor(None, self.almacen.escribirLote, registros)
+                self.almacen.aplicarLote(registros)
+            except Exception as error:
+                for *_, confirmacion in lote:
+                    if not confirmacion.done():
+                        confirmacion.set_exception(error)
+            else:
+                for *_, confirmacion in lote:
+                    if not confirmacion.done():
+                        confirmacion.set_result(None)
+
+    async def registrar(self, peticion):
+        nombre = peticion["nombre"]
+        if not isinstance(nombre, str):
+            raise TypeError("el nombre debe ser texto")
+        materias = {str(materia): float(calificacion)
+                    for materia, calificacion in peticion["materias"].items()}
+        confirmacion = asyncio.get_running_loop().create_future()
+        await self.cola.put((nombre, materias, confirmacion))
+        await confirmacion
+        return {"ok": True}
+
+    def mostrar(self, peticion):
+        agregados = self.almacen.agregados
+        if "nombre" in peticion:
+            nombre = peticion["nombre"]
+            if nombre not in self.almacen:
+                return {"ok": False, "error": f"no existe el estudiante {nombre}"}
+            return {"ok": True, "materias": self.almacen[nombre],
+                    "promedio": agregados.promedioEstudiante(nombre)}
+        return {"ok": True, "estudiantes": dict(self.almacen.items())}
+
+    def promedio(self, peticion):
+        agregados = self.almacen.agregados
+        if "materia" in peticion:
+            return {"ok": True, "promedio": agregados.promedioMateria(peticion["materia"])}
+        return {"ok": True, "promedio": agregados.promedioGeneral()}
+
+    async def atender(self, peticion):
+        operacion = peticion.get("op")
+        if operacion == "registrar":
+            return await self.registrar(peticion)
+        if operacion == "mostrar":
+            return self.mostrar(peticion)
+        if operacion == "promedio":
+            return self.promedio(peticion)
+        return {"ok": False, "error": f"operacion desconocida: {operacion}"}
+
+    async def cliente(self, lector, escritor):
+        try:
+            while True:
+                linea = await lector.readline()
+                if not linea:
+                    break
+                try:
+                    respuesta = await self.atender(json.loads(linea))
+                except (ValueError, KeyError, TypeError, AttributeError) as error:
+                    respuesta = {"ok": False, "error": f"peticion no valida: {error}"}
+                except OSError as error:
+                    respuesta = {"ok": False, "error": f"no se pudo guardar: {error}"}
+                escritor.write(json.dumps(respuesta, ensure_ascii=False).encode("utf-8") + b"\n")
+                await escritor.drain()
+        except ConnectionError:
+            pass
+        finally:
+            escritor.close()
+
+
+async def servir(almacen, host="127.0.0.1", port=8765, unix=None):
+    servidor = Servidor(almacen)
+    escritor = asyncio.create_task(servidor.escritor())
+    if unix:
+        red = await asyncio.start_unix_server(servidor.cliente, path=unix)
+    else:
+        red = await asyncio.start_server(servidor.cliente, host, port)
+    direcciones = ", ".join(str(socket.getsockname()) for socket in red.sockets)
+    print(f"Escuchando en {direcciones}", flush=True)
+    try:
+        # terminar con SIGTERM igual que con Ctrl+C (no existe en Windows)
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    except NotImplementedError:
+        pass
+    try:
+        async with red:
+            await red.serve_forever()
+    except asyncio.CancelledError:
+        pass
+    finally:
+        escritor.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor de registro de estudiantes.")
+    parser.add_argument("--datos", default="estudiantes", help="ruta del almacen (sin extension)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="ruta de un socket Unix en lugar de TCP")
+    args = parser.parse_args()
+
+    try:
+        # cada lote hace su propio fsync
+        almacen = AlmacenDiario(args.datos, legado="archivo.txt", sync_cada=1)
+    except BlockingIOError as error:
+        raise SystemExit(f"No se puede iniciar el servidor: {error}")
+    try:
+        asyncio.run(servir(almacen, args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        almacen.cerrar()
+        print("Datos guardados. Hasta luego.")
+
+
+if __name__ == "__main__":
+    main()
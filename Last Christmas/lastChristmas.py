@@ -1,33 +1,8 @@
 import pygame
-import numpy as np
 import time
 
-pygame.mixer.init(frequency=44100, size=-16, channels=1, buffer=512)
-
-def generate_tone(frequency, duration, volume=0.3, sample_rate=44100):
-    t = np.linspace(0, duration, int(sample_rate * duration), False)
-    wave = 0.5 * np.sin(2 * np.pi * frequency * t)
-    audio = (wave * volume * 32767).astype(np.int16)
-    # convertir a estereo
-    stereo_audio = np.column_stack((audio, audio))
-    sound = pygame.sndarray.make_sound(stereo_audio)
-    return sound
-
-NOTAS = {
-    "C5": 523.25,
-    "D5": 587.33,
-    "E5": 659.25,
-    "F5": 698.46,
-    "G5": 783.99,
-    "A5": 880.00,
-    "A5#": 932.33,
-    "pause": 0 
-}
-
-full = 1.5
-half = 0.75
-quarter = 0.375
-eight = 0.187
+from notas import NOTAS, half, quarter, eight
+from sequencer import render_score, to_sound
 
 lastChristmas = [
     ("G5", quarter + eight),
@@ -69,11 +44,12 @@ lastChristmas = [
     ("pause", half-0.05),
 ]
 
-while True:
-    for notas, duracion in lastChristmas:
-        if NOTAS[notas] == 0:
-            time.sleep(duracion)
-        else:
-            tone = generate_tone(NOTAS[notas], duracion)
-            tone.play()
-            time.sleep(duracion)
+if __name__ == "__main__":
+    pygame.mixer.init(frequency=44100, size=-16, channels=1, buffer=512)
+
+    # toda la cancion en un solo sonido que se repite sin cortes
+    cancion = to_sound(render_score(lastChristmas, NOTAS))
+    cancion.play(loops=-1)
+
+    while True:
+        time.sleep(1)
@@ -0,0 +1,37 @@
+"""Tabla de notas y duraciones que usan las partituras."""
+import re
+
+NOTAS = {
+    "C5": 523.25,
+    "D5": 587.33,
+    "E5": 659.25,
+    "F5": 698.46,
+    "G5": 783.99,
+    "A5": 880.00,
+    "A5#": 932.33,
+    "pause": 0
+}
+
+full = 1.5
+half = 0.75
+quarter = 0.375
+eight = 0.187
+
+DURACIONES = {"full": full, "half": half, "quarter": quarter, "eight": eight}
+
+SEMITONOS = {"C": 0, "D": 2, "E": 4, "F": 5, "G": 7, "A": 9, "B": 11}
+
+
+def note_frequency(nombre):
+    """Frecuencia de una nota: de NOTAS, o calculada (temperamento igual, A4 = 440).
+
+    Acepta el sostenido antes o despues de la octava: "A#5" o "A5#".
+    """
+    if nombre in NOTAS:
+        return NOTAS[nombre]
+    match = re.fullmatch(r"([A-G])(#?)(-?\d)(#?)", nombre)
+    if match is None:
+        raise ValueError(f"nota desconocida: {nombre!r}")
+    letra, sostenido, octava, sostenido_final = match.groups()
+    semitono = SEMITONOS[letra] + len(sostenido + sostenido_final) + 12 * (int(octava) + 1)
+    return 440.0 * 2 ** ((semitono - 69) / 12)
@@ -0,0 +1,129 @@
+"""Convierte una carpeta de partituras en archivos WAV, en paralelo y sin tarjeta de sonido.
+
+Una partitura tiene una nota por linea: el nombre de la nota y su
+duracion, en segundos o como suma (o resta) de los nombres de
+notas.DURACIONES. Se ignoran las lineas vacias y los comentarios (un '#'
+al principio de la linea o despues de un espacio):
+
+    # last christmas
+    G5 quarter+eight
+    G5 quarter
+    pause 0.25
+
+Cada partitura se sintetiza de una vez con sequencer.render_score y los
+archivos se reparten entre un grupo de procesos.
+
+    python renderScores.py partituras/ salida/ --workers 8
+"""
+import argparse
+import glob
+import multiprocessing
+import os
+import re
+import time
+import wave
+
+from notas import DURACIONES, note_frequency
+from sequencer import render_score
+
+# '#' tambien marca sostenidos ("A5#"): un comentario va al inicio o tras un espacio
+COMMENT = re.compile(r"(^|\s)#.*")
+
+
+def parse_duration(text):
+    """'quarter+eight', 'half-0.05' o '0.4': nombres de DURACIONES y segundos."""
+    total = 0.0
+    sign = 1
+    for part in re.split(r"([+-])", text):
+        if part in ("+", "-"):
+            sign = 1 if part == "+" else -1
+        elif part:
+            total += sign * (DURACIONES[part] if part in DURACIONES else float(part))
+    if total <= 0:
+        raise ValueError(f"duracion no valida: {text!r}")
+    return total
+
+
+def read_score(path):
+    """Devuelve la partitura como lista de (nota, duracion) y su tabla de frecuencias."""
+    score = []
+    notes = {}
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            fields = COMMENT.sub("", line).split()
+            if not fields:
+                continue
+            if len(fields) != 2:
+                raise ValueError(f"{path}:{line_number}: se esperaba 'nota duracion'")
+            nota, duracion = fields
+            try:
+                notes[nota] = note_frequency(nota)
+                score.append((nota, parse_duration(duracion)))
+            except (KeyError, ValueError) as error:
+                raise ValueError(f"{path}:{line_number}: {error}") from None
+    return score, notes
+
+
+def write_wav(path, audio, sample_rate):
+    with wave.open(path, "wb") as wave_file:
+        wave_file.setnchannels(1)
+        wave_file.setsampwidth(2)
+        wave_file.setframerate(sample_rate)
+        wave_file.writeframes(audio.tobytes())
+
+
+def _render_one(task):
+    score_path, output_path, sample_rate, volume = task
+    try:
+        score, notes = read_score(score_path)
+        audio = render_score(score, notes, volume, sample_rate)
+        write_wav(output_path, audio, sample_rate)
+    except (OSError, ValueError) as error:
+        return score_path, None, str(error)
+    return score_path, len(audio) / sample_rate, None
+
+
+def render_scores(input_dir, output_dir, pattern="*.txt", sample_rate=44100, volume=0.3,
+                  workers=None):
+    """Convierte las partituras de input_dir y devuelve las rutas (convertidas, fallidas)."""
+    os.makedirs(output_dir, exist_ok=True)
+    tasks = []
+    for score_path in sorted(glob.glob(os.path.join(input_dir, pattern))):
+        name = os.path.splitext(os.path.basename(score_path))[0] + ".wav"
+        tasks.append((score_path, os.path.join(output_dir, name), sample_rate, volume))
+
+    rendered, failed = [], []
+    workers = workers or os.cpu_count()
+    chunksize = max(1, len(tasks) // (4 * workers))
+    with multiprocessing.Pool(workers) as pool:
+        for score_path, seconds, error in pool.imap_unordered(_render_one, tasks, chunksize):
+            if error is None:
+                rendered.append(score_path)
+                print(f"{os.path.basename(score_path)}: {seconds:.2f} s")
+            else:
+                failed.append(score_path)
+                print(f"ERROR {error}")
+    return rendered, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convierte partituras en archivos WAV.")
+    parser.add_argument("input_dir", help="carpeta con las partituras")
+    parser.add_argument("output_dir", help="carpeta donde se guardan los WAV")
+    parser.add_argument("--pattern", default="*.txt", help="archivos a convertir")
+    parser.add_argument("--sample-rate", type=int, default=44100)
+    parser.add_argument("--volume", type=float, default=0.3)
+    parser.add_argument("--workers", type=int, default=None, help="procesos (por defecto, uno por CPU)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    rendered, failed = render_scores(args.input_dir, args.output_dir, args.pattern,
+                                     args.sample_rate, args.volume, args.workers)
+    print(f"{len(rendered)} partituras convertidas en {time.perf_counter() - start:.1f} s")
+    if failed:
+        print(f"{len(failed)} con errores")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
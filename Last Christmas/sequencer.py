@@ -0,0 +1,73 @@
+"""Secuenciador: convierte una partitura completa en un solo buffer de audio.
+
+Una partitura es una lista de (nota, duracion en segundos) como la de
+lastChristmas.py, y las notas se buscan en una tabla como NOTAS
+("pause" o frecuencia 0 es silencio). El inicio de cada nota se calcula
+desde el principio de la cancion y se redondea a la muestra, asi que el
+tempo no se desvia aunque la cancion se repita muchas veces.
+"""
+import numpy as np
+import pygame
+
+
+def note_bounds(score, sample_rate=44100):
+    """Muestra de inicio de cada nota, mas el final de la ultima."""
+    durations = [duracion for _, duracion in score]
+    return np.rint(np.concatenate(([0.0], np.cumsum(durations))) * sample_rate).astype(np.int64)
+
+
+# tonos distintos que se guardan ya calculados
+TONE_CACHE_SIZE = 128
+# (frecuencia, muestras, volumen, muestreo, rampa) -> tono, del mas viejo al mas nuevo
+_tonos = {}
+
+
+def tone(frequency, length, volume=0.3, sample_rate=44100, fade=0.005):
+    """Tono de `length` muestras con rampas de `fade` segundos, como float32 de solo lectura.
+
+    Se guarda por sus parametros, asi que cada nota distinta se calcula una sola vez.
+    """
+    clave = (frequency, length, volume, sample_rate, fade)
+    audio = _tonos.pop(clave, None)
+    if audio is None:
+        audio = np.empty(length, dtype=np.float32)
+        t = np.arange(length) / sample_rate
+        np.sin(2 * np.pi * frequency * t, out=audio, casting='same_kind')
+        ramp = min(max(1, int(fade * sample_rate)), length // 2)
+        if ramp:
+            envelope = np.linspace(0, 1, ramp, endpoint=False, dtype=np.float32)
+            audio[:ramp] *= envelope
+            audio[length - ramp:] *= envelope[::-1]
+        audio *= 0.5 * volume * 32767
+        audio.flags.writeable = False
+        if len(_tonos) >= TONE_CACHE_SIZE:
+            del _tonos[next(iter(_tonos))]
+    # se vuelve a insertar para que quede como el mas reciente
+    _tonos[clave] = audio
+    return audio
+
+
+def render_score(score, notes, volume=0.3, sample_rate=44100, fade=0.005):
+    """Devuelve la partitura entera como un arreglo int16 mono.
+
+    Cada nota se copia en su tramo del buffer desde tone(), con rampas de
+    `fade` segundos al entrar y al salir para que no haya clics entre notas.
+    """
+    bounds = note_bounds(score, sample_rate)
+    buffer = np.zeros(bounds[-1], dtype=np.float32)
+
+    for (nota, _), start, end in zip(score, bounds[:-1], bounds[1:]):
+        frequency = notes[nota]
+        if frequency == 0 or end == start:
+            continue
+        buffer[start:end] = tone(frequency, int(end - start), volume, sample_rate, fade)
+
+    return buffer.astype(np.int16)
+
+
+def to_sound(audio):
+    """Crea un Sound con tantos canales como tenga abiertos el mezclador."""
+    channels = pygame.mixer.get_init()[2]
+    if channels > 1:
+        audio = np.repeat(audio[:, np.newaxis], channels, axis=1)
+    return pygame.sndarray.make_sound(np.ascontiguousarray(audio))
@@ -0,0 +1,204 @@
+"""Sintetizador polifonico que genera el audio por bloques.
+
+Cada voz es un oscilador de tabla (seno, cuadrada o diente de sierra) con
+acumulador de fase, asi que cambiar la frecuencia de una nota que suena no
+produce saltos, y una envolvente ADSR. Todas las voces viven en arreglos
+de tamano fijo y cada bloque se calcula de una vez para todas, en un buffer
+que se reutiliza; la memoria no crece con la duracion de la pieza y la
+latencia queda limitada por el tamano de bloque.
+
+    engine = SynthEngine()
+    voz = engine.note_on(440.0)
+    ...
+    engine.pump(channel)   # llamar seguido, encola el siguiente bloque
+"""
+import time
+
+import numpy as np
+import pygame
+
+from sequencer import note_bounds, to_sound
+
+TABLE_SIZE = 2048
+# Armonicos usados para construir la cuadrada y la sierra (menos aliasing)
+TABLE_HARMONICS = 32
+WAVEFORMS = ("sine", "square", "saw")
+
+
+def _wavetables():
+    phase = 2 * np.pi * np.arange(TABLE_SIZE) / TABLE_SIZE
+    harmonics = np.arange(1, TABLE_HARMONICS + 1)[:, np.newaxis]
+    partials = np.sin(harmonics * phase) / harmonics
+    tables = np.stack([
+        np.sin(phase),
+        4 / np.pi * partials[::2].sum(axis=0),
+        2 / np.pi * partials.sum(axis=0),
+    ])
+    # Repetir la primera muestra al final para interpolar sin envolver el indice
+    return np.concatenate([tables, tables[:, :1]], axis=1).astype(np.float32)
+
+
+class ADSR:
+    """Tiempos en segundos; sustain es el nivel (0-1) mientras se mantiene la nota."""
+
+    def __init__(self, attack=0.01, decay=0.1, sustain=0.7, release=0.2):
+        self.attack = attack
+        self.decay = decay
+        self.sustain = sustain
+        self.release = release
+
+
+class SynthEngine:
+    def __init__(self, sample_rate=44100, block_size=512, max_voices=32,
+                 envelope=None, waveform="sine"):
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        self.max_voices = max_voices
+        self.envelope = envelope or ADSR()
+        self.waveform = waveform
+        self.tables = _wavetables()
+
+        self.active = np.zeros(max_voices, dtype=bool)
+        self.phase = np.zeros(max_voices)
+        self.increment = np.zeros(max_voices)
+        self.velocity = np.zeros(max_voices, dtype=np.float32)
+        self.table = np.zeros(max_voices, dtype=np.int64)
+        # Edad en muestras desde note_on, y edad en la que llego note_off
+        self.age = np.zeros(max_voices, dtype=np.int64)
+        self.release_age = np.full(max_voices, np.inf)
+        self.attack = np.ones(max_voices)
+        self.decay = np.ones(max_voices)
+        self.sustain = np.ones(max_voices)
+        self.release = np.ones(max_voices)
+
+        self._offsets = np.arange(block_size)
+        self._mix = np.zeros(block_size, dtype=np.float32)
+        self._out = np.zeros(block_size, dtype=np.int16)
+
+    def note_on(self, frequency, velocity=0.3, waveform=None, envelope=None):
+        """Empieza una nota y devuelve su voz; sin voces libres se roba la mas vieja."""
+        free = np.flatnonzero(~self.active)
+        voice = int(free[0]) if len(free) else int(np.argmax(self.age))
+        envelope = envelope or self.envelope
+
+        self.active[voice] = True
+        self.phase[voice] = 0.0
+        self.velocity[voice] = velocity
+        self.table[voice] = WAVEFORMS.index(waveform or self.waveform)
+        self.age[voice] = 0
+        self.release_age[voice] = np.inf
+        self.attack[voice] = max(1.0, envelope.attack * self.sample_rate)
+        self.decay[voice] = max(1.0, envelope.decay * self.sample_rate)
+        self.sustain[voice] = envelope.sustain
+        self.release[voice] = max(1.0, envelope.release * self.sample_rate)
+        self.set_frequency(voice, frequency)
+        return voice
+
+    def note_off(self, voice):
+        if self.active[voice] and np.isinf(self.release_age[voice]):
+            self.release_age[voice] = self.age[voice]
+
+    def set_frequency(self, voice, frequency):
+        """Cambia la frecuencia desde el proximo bloque conservando la fase."""
+        self.increment[voice] = frequency * TABLE_SIZE / self.sample_rate
+
+    def all_notes_off(self):
+        for voice in np.flatnonzero(self.active):
+            self.note_off(voice)
+
+    def _held_level(self, voices, t):
+        attack, decay, sustain = self.attack[voices], self.decay[voices], self.sustain[voices]
+        return np.where(t < attack, t / attack,
+                        np.where(t < attack + decay,
+                                 1 - (1 - sustain) * (t - attack) / decay,
+                                 sustain))
+
+    def _envelope(self, voices):
+        t = (self.age[voices][:, np.newaxis] + self._offsets).astype(np.float64)
+        release_age = self.release_age[voices][:, np.newaxis]
+        level = self._held_level(voices[:, np.newaxis], t)
+        released = t >= release_age
+        if released.any():
+            held_until = np.where(np.isinf(release_age), 0, release_age)
+            start = self._held_level(voices[:, np.newaxis], held_until)
+            fade = np.clip(1 - (t - release_age) / self.release[voices][:, np.newaxis], 0, 1)
+            level = np.where(released, start * fade, level)
+        return level
+
+    def render_block(self):
+        """Mezcla el siguiente bloque de todas las voces en el buffer int16 reutilizado."""
+        voices = np.flatnonzero(self.active)
+        self._mix.fill(0)
+        if len(voices):
+            position = self.phase[voices][:, np.newaxis] + self.increment[voices][:, np.newaxis] * self._offsets
+            position %= TABLE_SIZE
+            index = position.astype(np.int64)
+            frac = position - index
+            rows = self.table[voices][:, np.newaxis]
+            left = self.tables[rows, index]
+            samples = left + (self.tables[rows, index + 1] - left) * frac
+
+            samples *= self._envelope(voices) * self.velocity[voices][:, np.newaxis]
+            np.sum(samples, axis=0, out=self._mix, dtype=np.float32)
+
+            self.phase[voices] = (self.phase[voices] + self.increment[voices] * self.block_size) % TABLE_SIZE
+            self.age[voices] += self.block_size
+            finished = self.age[voices] - self.release_age[voices] >= self.release[voices]
+            self.active[voices[finished]] = False
+
+        np.clip(self._mix, -1, 1, out=self._mix)
+        np.multiply(self._mix, 32767, out=self._out, casting='unsafe')
+        return self._out
+
+    def pump(self, channel):
+        """Genera un bloque si el canal tiene sitio (uno sonando y otro en cola).
+
+        Devuelve True si genero un bloque.
+        """
+        if not channel.get_busy():
+            channel.play(to_sound(self.render_block()))
+        elif channel.get_queue() is None:
+            channel.queue(to_sound(self.render_block()))
+        else:
+            return False
+        return True
+
+    def block_duration(self):
+        return self.block_size / self.sample_rate
+
+
+def play_score(engine, score, notes, channel=None, volume=0.3):
+    """Toca una partitura (nota, duracion) en tiempo real a traves del motor.
+
+    Las notas empiezan y terminan en el bloque que les corresponde segun
+    su muestra de inicio, asi que el error de tiempo no pasa de un bloque
+    y no se acumula.
+    """
+    channel = channel or pygame.mixer.Channel(0)
+    bounds = note_bounds(score, engine.sample_rate) // engine.block_size
+    events = []
+    for index, ((nota, _), start, end) in enumerate(zip(score, bounds[:-1], bounds[1:])):
+        if notes[nota] != 0:
+            events.append((start, "on", index))
+            # al menos un bloque: en el mismo bloque el note_off iria antes que su note_on
+            events.append((max(end, start + 1), "off", index))
+    events.sort(key=lambda event: (event[0], event[1] == "on"))
+
+    block = 0
+    queued = 0
+    voices = {}  # nota de la partitura -> voz que la esta tocando
+    last_block = max(bounds[-1], events[-1][0] if events else 0)
+    # seguir hasta que se apague el release de la ultima nota
+    last_block += int(engine.envelope.release * engine.sample_rate / engine.block_size) + 1
+    while block <= last_block:
+        while queued < len(events) and events[queued][0] <= block:
+            _, kind, index = events[queued]
+            if kind == "on":
+                voices[index] = engine.note_on(notes[score[index][0]], volume)
+            else:
+                engine.note_off(voices.pop(index))
+            queued += 1
+        if engine.pump(channel):
+            block += 1
+        else:
+            time.sleep(engine.block_duration() / 2)
@@ -0,0 +1,220 @@
+"""Headless benchmarks for the audio visualizer hot paths.
+
+Synthesizes WAV fixtures, runs under SDL's dummy drivers and writes the
+results as JSON. A saved result file can be used as a baseline to flag
+regressions:
+
+    python benchmark.py --output base.json
+    python benchmark.py --output nuevo.json --compare base.json --tolerance 0.1
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import wave
+from dataclasses import asdict, replace
+from typing import Callable, Dict, List, Tuple
+
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+import numpy as np
+import pygame
+
+from visualizador import (AudioVisualizer, BeatDetector, TrackAnalysis, VisualizerConfig,
+                          generate_lightning_paths)
+
+# (seconds, sample rate, channels)
+FIXTURES = [(10, 44100, 1), (10, 48000, 2), (60, 22050, 1)]
+QUICK_FIXTURES = [(5, 44100, 1)]
+WINDOW_SIZES = [(800, 765), (1280, 720), (1920, 1080)]
+QUICK_WINDOW_SIZES = [(800, 765)]
+PRESETS = {
+    "default": VisualizerConfig(),
+    "low": VisualizerConfig(num_bright_spirals=6, num_dark_spirals=6, blur_scale=8),
+    "high": VisualizerConfig(chunk_size=2048, num_bright_spirals=30, num_dark_spirals=30),
+}
+
+
+def write_fixture(path: str, seconds: float, sample_rate: int, channels: int, seed: int = 0):
+    """A kick-like pulse under a sweep and some noise, as 16-bit PCM."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    kick = np.sin(2 * np.pi * 55 * t) * np.exp(-(t % 0.5) * 12)
+    sweep = 0.3 * np.sin(2 * np.pi * (200 + 1800 * (t % 4) / 4) * t)
+    signal = 0.6 * kick + sweep + 0.05 * rng.standard_normal(len(t))
+    samples = np.repeat(signal[:, np.newaxis], channels, axis=1)
+    pcm = (np.clip(samples, -1, 1) * 32767 * 0.8).astype('<i2')
+    with wave.open(path, 'wb') as wave_file:
+        wave_file.setnchannels(channels)
+        wave_file.setsampwidth(2)
+        wave_file.setframerate(sample_rate)
+        wave_file.writeframes(pcm.tobytes())
+
+
+def measure(fn: Callable[[], object], min_time: float, warmup: int = 3) -> Dict[str, float]:
+    for _ in range(warmup):
+        fn()
+    times = []
+    start = time.perf_counter()
+    while time.perf_counter() - start < min_time or len(times) < 5:
+        call_start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - call_start)
+    times_ms = np.array(times) * 1000
+    return {
+        "calls": len(times),
+        "mean_ms": float(times_ms.mean()),
+        "p50_ms": float(np.percentile(times_ms, 50)),
+        "p95_ms": float(np.percentile(times_ms, 95)),
+        "ops_per_sec": float(len(times) / times_ms.sum() * 1000),
+    }
+
+
+def _cycle(frames: np.ndarray) -> Callable[[], np.ndarray]:
+    state = {"i": 0}
+
+    def next_frame() -> np.ndarray:
+        state["i"] = (state["i"] + 1) % len(frames)
+        return frames[state["i"]]
+    return next_frame
+
+
+def _visualizer(audio_file: str, config: VisualizerConfig, size: Tuple[int, int]) -> AudioVisualizer:
+    visualizer = AudioVisualizer(audio_file, replace(config, width=size[0], height=size[1]))
+    visualizer.rng = np.random.default_rng(0)
+    return visualizer
+
+
+def run_benchmarks(workdir: str, fixtures, window_sizes, min_time: float) -> List[dict]:
+    results = []
+
+    def record(name: str, params: dict, stats: Dict[str, float]):
+        results.append({"name": name, "params": params, **stats})
+        print(f"{name:<24} {json.dumps(params):<70} {stats['ops_per_sec']:>10.1f} ops/s",
+              flush=True)
+
+    for seconds, sample_rate, channels in fixtures:
+        audio_file = os.path.join(workdir, f"fixture_{seconds}s_{sample_rate}_{channels}ch.wav")
+        write_fixture(audio_file, seconds, sample_rate, channels)
+        fixture = {"seconds": seconds, "sample_rate": sample_rate, "channels": channels}
+
+        for preset_name, preset in PRESETS.items():
+            params = {**fixture, "preset": preset_name}
+            config = replace(preset, analysis_cache_dir=os.path.join(workdir, "cache"))
+
+            # Cold analysis of the whole track (cache wiped every call)
+            def analyze():
+                shutil.rmtree(config.analysis_cache_dir, ignore_errors=True)
+                return TrackAnalysis.load_or_compute(audio_file, config)
+            record("track_analysis", params, measure(analyze, min_time, warmup=1))
+            analysis = TrackAnalysis.load_or_compute(audio_file, config)
+            spectrogram = np.asarray(analysis.spectrogram)
+
+            detector = BeatDetector.from_config(config)
+            next_frame = _cycle(spectrogram)
+            beat_time = {"ms": 0.0}
+
+            def detect_beat():
+                beat_time["ms"] += 1000 / 60
+                return detector.update(next_frame(), beat_time["ms"])
+            record("detect_beat", params, measure(detect_beat, min_time))
+
+            for use_cache in (True, False):
+                visualizer = _visualizer(audio_file, replace(config, use_analysis_cache=use_cache),
+                                         (config.width, config.height))
+                record("get_fft_data", {**params, "cached": use_cache},
+                       measure(visualizer.get_fft_data, min_time))
+                visualizer.cleanup()
+
+            for size in window_sizes:
+                size_params = {**params, "window": list(size)}
+                visualizer = _visualizer(audio_file, config, size)
+                next_frame = _cycle(spectrogram)
+                record("_draw_spirals", size_params, measure(
+                    lambda: visualizer._draw_spirals(next_frame(), visualizer.compositor.layer),
+                    min_time))
+                record("draw_frame", size_params, measure(
+                    lambda: visualizer.draw_frame(next_frame()), min_time))
+                visualizer.cleanup()
+
+    rng = np.random.default_rng(0)
+    for num_paths in (4, 32, 128):
+        starts = np.full((num_paths, 2), 400)
+        ends = rng.integers(0, 800, (num_paths, 2))
+        record("generate_lightning_paths", {"paths": num_paths}, measure(
+            lambda: generate_lightning_paths(starts, ends, 6, rng), min_time))
+    return results
+
+
+def _key(result: dict) -> str:
+    return result["name"] + " " + json.dumps(result["params"], sort_keys=True)
+
+
+def compare(results: List[dict], baseline: List[dict], tolerance: float) -> List[Tuple[str, float]]:
+    """Return (case, relative change) for every case slower than baseline by more than tolerance."""
+    base = {_key(result): result["ops_per_sec"] for result in baseline}
+    regressions = []
+    for result in results:
+        key = _key(result)
+        if key not in base:
+            continue
+        change = result["ops_per_sec"] / base[key] - 1
+        if change < -tolerance:
+            regressions.append((key, change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the audio visualizer headless.")
+    parser.add_argument("--output", default="benchmark.json")
+    parser.add_argument("--compare", help="baseline JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="allowed throughput drop against the baseline (0.10 = 10%%)")
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds per case")
+    parser.add_argument("--quick", action="store_true", help="one short fixture and window size")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="visualizer_bench_")
+    try:
+        results = run_benchmarks(
+            workdir,
+            QUICK_FIXTURES if args.quick else FIXTURES,
+            QUICK_WINDOW_SIZES if args.quick else WINDOW_SIZES,
+            args.min_time,
+        )
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pygame": pygame.version.ver,
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+            "presets": {name: asdict(preset) for name, preset in PRESETS.items()},
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Resultados guardados en {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        for key, change in regressions:
+            print(f"REGRESION {change:+.1%}  {key}")
+        if regressions:
+            sys.exit(1)
+        print("Sin regresiones")
+
+
+if __name__ == "__main__":
+    main()
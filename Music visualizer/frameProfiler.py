@@ -0,0 +1,130 @@
+"""Per-stage frame timing for the audio visualizer.
+
+Each stage is timed with time.perf_counter_ns. The last `window` samples of
+every stage are kept in a NumPy ring buffer for rolling p50/p95/p99, and
+every timed span is also recorded so it can be exported as CSV or as a
+Chrome trace (chrome://tracing, Perfetto) when the visualizer exits.
+"""
+import csv
+import json
+import os
+import time
+from collections import deque
+from contextlib import nullcontext
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pygame
+
+STAGES = (
+    "get_fft_data",
+    "_draw_background",
+    "_draw_glow_effect",
+    "_draw_spirals",
+    "apply_fast_blur",
+    "_draw_lightning_bolts",
+    "flip",
+    "frame",
+)
+PERCENTILES = (50, 95, 99)
+
+# Shared no-op context returned while profiling is off
+NO_PROFILE = nullcontext()
+
+
+class _Span:
+    __slots__ = ("profiler", "stage", "start")
+
+    def __init__(self, profiler: "FrameProfiler", stage: str):
+        self.profiler = profiler
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.record(self.stage, self.start, time.perf_counter_ns() - self.start)
+        return False
+
+
+class FrameProfiler:
+    def __init__(self, window: int = 300, max_events: int = 200_000):
+        self.window = max(1, window)
+        self.samples = {stage: np.zeros(self.window) for stage in STAGES}
+        self.counts = {stage: 0 for stage in STAGES}
+        self.events: deque = deque(maxlen=max_events)
+        self.frame = 0
+        self.origin = time.perf_counter_ns()
+
+        self.show_hud = False
+        self._font: Optional[pygame.font.Font] = None
+        self._hud_lines: List[pygame.Surface] = []
+        self._hud_age = 0
+
+    def stage(self, name: str) -> _Span:
+        return _Span(self, name)
+
+    def record(self, stage: str, start_ns: int, duration_ns: int):
+        count = self.counts[stage]
+        self.samples[stage][count % self.window] = duration_ns / 1e6
+        self.counts[stage] = count + 1
+        self.events.append((self.frame, stage, start_ns - self.origin, duration_ns))
+
+    def end_frame(self):
+        self.frame += 1
+
+    def percentiles(self) -> Dict[str, Tuple[float, ...]]:
+        """Rolling (p50, p95, p99) in milliseconds for every stage with samples."""
+        result = {}
+        for stage in STAGES:
+            count = min(self.counts[stage], self.window)
+            if count:
+                values = np.percentile(self.samples[stage][:count], PERCENTILES)
+                result[stage] = tuple(float(v) for v in values)
+        return result
+
+    def draw_hud(self, surface: pygame.Surface, refresh_frames: int = 15) -> Optional[pygame.Rect]:
+        """Blit the percentile table; text is re-rendered every refresh_frames calls."""
+        if not self.show_hud:
+            return None
+        if self._font is None:
+            pygame.font.init()
+            self._font = pygame.font.Font(None, 20)
+        if self._hud_age % refresh_frames == 0 or not self._hud_lines:
+            lines = [f"{'stage':<22}{'p50':>8}{'p95':>8}{'p99':>8}  ms"]
+            for stage, values in self.percentiles().items():
+                lines.append(f"{stage:<22}" + "".join(f"{v:8.2f}" for v in values))
+            self._hud_lines = [self._font.render(line, True, (255, 255, 255), (0, 0, 0))
+                               for line in lines]
+        self._hud_age += 1
+
+        y = 5
+        rect = None
+        for line in self._hud_lines:
+            line_rect = surface.blit(line, (5, y))
+            rect = line_rect if rect is None else rect.union(line_rect)
+            y += line.get_height()
+        return rect
+
+    def export(self, path: str):
+        """Write recorded spans to path; .json gives a Chrome trace, anything else CSV."""
+        if os.path.splitext(path)[1].lower() == ".json":
+            trace = [{
+                "name": stage,
+                "cat": "frame",
+                "ph": "X",
+                "ts": start_ns / 1000,
+                "dur": duration_ns / 1000,
+                "pid": os.getpid(),
+                "tid": 0,
+                "args": {"frame": frame},
+            } for frame, stage, start_ns, duration_ns in self.events]
+            with open(path, "w") as f:
+                json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
+        else:
+            with open(path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["frame", "stage", "start_us", "duration_us"])
+                for frame, stage, start_ns, duration_ns in self.events:
+                    writer.writerow([frame, stage, start_ns / 1000, duration_ns / 1000])
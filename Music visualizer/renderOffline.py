@@ -0,0 +1,117 @@
+"""Render a whole track offline to numbered PNGs or a raw RGB stream.
+
+Frames are drawn headless with SDL's dummy video driver at a fixed frame
+rate, split into contiguous chunks across a process pool. Every frame is
+seeded from (seed, frame number), so the output does not depend on the
+number of workers.
+
+    python renderOffline.py cancion.wav salida/ --fps 60 --workers 8
+    python renderOffline.py cancion.wav salida.rgb --format rgb
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+from typing import Optional, Tuple
+
+import pygame
+
+from visualizador import AudioVisualizer, LightningBoltPool, TrackAnalysis, VisualizerConfig
+
+# Bolts live at most MAX_LIFETIME frames, so replaying that many frames
+# before a chunk rebuilds exactly the bolts that are alive at its start
+WARMUP_FRAMES = LightningBoltPool.MAX_LIFETIME
+
+_visualizer: Optional[AudioVisualizer] = None
+
+
+def _init_worker(audio_file: str, config: VisualizerConfig):
+    global _visualizer
+    _visualizer = AudioVisualizer(audio_file, config, offline=True)
+
+
+def _render_chunk(task: Tuple[int, int, int, int, str, str]) -> int:
+    start, end, fps, seed, output, image_format = task
+    visualizer = _visualizer
+    visualizer.lightning.clear()
+
+    raw_file = None
+    if image_format == "rgb":
+        raw_file = open(_chunk_path(output, start), "wb")
+    try:
+        for frame_number in range(max(0, start - WARMUP_FRAMES), end):
+            visualizer.draw_offline_frame(frame_number, fps, seed)
+            if frame_number < start:
+                continue
+            if raw_file is not None:
+                raw_file.write(pygame.image.tobytes(visualizer.screen, "RGB"))
+            else:
+                pygame.image.save(visualizer.screen,
+                                  os.path.join(output, f"frame_{frame_number:06d}.png"))
+    finally:
+        if raw_file is not None:
+            raw_file.close()
+    return end - start
+
+
+def _chunk_path(output: str, start: int) -> str:
+    return f"{output}.part{start:08d}"
+
+
+def render_offline(audio_file: str, output: str, config: Optional[VisualizerConfig] = None,
+                   fps: int = 60, image_format: str = "png", workers: Optional[int] = None,
+                   seed: int = 0, chunk_frames: int = 120) -> int:
+    """Render audio_file to output and return the number of frames written."""
+    config = config or VisualizerConfig()
+    # Compute (or load) the cached analysis once so workers only memory-map it
+    analysis = TrackAnalysis.load_or_compute(audio_file, config)
+    total_frames = int(analysis.duration * fps)
+
+    if image_format == "png":
+        os.makedirs(output, exist_ok=True)
+    tasks = [(start, min(start + chunk_frames, total_frames), fps, seed, output, image_format)
+             for start in range(0, total_frames, chunk_frames)]
+
+    written = 0
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(workers, initializer=_init_worker,
+                      initargs=(audio_file, config)) as pool:
+        for count in pool.imap_unordered(_render_chunk, tasks):
+            written += count
+            print(f"\r{written}/{total_frames} frames", end="", flush=True)
+        # Let workers exit on their own; pygame swallows the SIGTERM
+        # that Pool.terminate() would send
+        pool.close()
+        pool.join()
+    print()
+
+    if image_format == "rgb":
+        with open(output, "wb") as stream:
+            for start, *_ in tasks:
+                part = _chunk_path(output, start)
+                with open(part, "rb") as f:
+                    shutil.copyfileobj(f, stream)
+                os.remove(part)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render the audio visualizer to frames offline.")
+    parser.add_argument("audio_file")
+    parser.add_argument("output", help="directory for PNGs, or file for the raw RGB stream")
+    parser.add_argument("--format", choices=("png", "rgb"), default="png")
+    parser.add_argument("--fps", type=int, default=60)
+    parser.add_argument("--width", type=int, default=VisualizerConfig.width)
+    parser.add_argument("--height", type=int, default=VisualizerConfig.height)
+    parser.add_argument("--workers", type=int, default=None, help="default: one per CPU")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    config = VisualizerConfig(width=args.width, height=args.height)
+    frames = render_offline(args.audio_file, args.output, config, fps=args.fps,
+                            image_format=args.format, workers=args.workers, seed=args.seed)
+    print(f"{frames} frames de {args.width}x{args.height} a {args.fps} fps -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,18 @@
 import pygame
 import numpy as np
-import wave
+import hashlib
+import json
+import os
+import sys
 import colorsys
-import random
+import functools
+import threading
+import time
 from dataclasses import dataclass
-from typing import List, Tuple, Optional
+from typing import List, Tuple, Optional, Sequence
+
+from frameProfiler import FrameProfiler, NO_PROFILE
+from wavReader import WavReader
 
 
 @dataclass
@@ -21,82 +29,617 @@ class VisualizerConfig:
     beat_threshold: float = 1.3
     beat_decay: float = 0.95
     bass_freq_range: Tuple[int, int] = (0, 50)
+    # FFT bin ranges watched for beats; None uses bass_freq_range alone
+    beat_bands: Optional[Tuple[Tuple[int, int], ...]] = None
+    # "flux" for spectral-flux onsets, "energy" for raw band energy
+    beat_onset: str = "flux"
+    beat_history_frames: int = 50
+    beat_max_intensity: float = 3.0
+    max_lightning_bolts: int = 64
+    # Draw num_bands "log"/"mel" bands instead of every linear FFT bin (None)
+    band_scale: Optional[str] = None
+    num_bands: int = 64
+    band_min_freq: float = 30.0
+    # Weight of the previous frame (0 = none) and how fast peaks fall back
+    band_smoothing: float = 0.0
+    band_decay: float = 0.0
+    blur_scale: int = 4
+
+    # Per-stage timing; F3 toggles the HUD, profile_output gets a .csv or .json trace on exit
+    profile: bool = False
+    profile_output: Optional[str] = None
+    profile_window: int = 300
+
+    # Trade detail for frame rate when frames miss the fps budget
+    adaptive_quality: bool = False
+    quality_levels: int = 6
+    min_spirals: int = 4
+    max_bin_stride: int = 4
+    max_blur_scale: int = 8
+    min_lightning_layers: int = 1
+    # Step down above this fraction of the budget, step up below the other
+    quality_down_ratio: float = 0.95
+    quality_up_ratio: float = 0.7
+    quality_patience: int = 30
+
+    # FFT frames the analysis thread may compute ahead of playback
+    analysis_ahead_frames: int = 64
+    # Precompute the whole track once and reuse it from disk on later runs
+    use_analysis_cache: bool = True
+    analysis_cache_dir: Optional[str] = None
+
+
+# Bump when the analysis output changes so old caches are ignored
+ANALYSIS_VERSION = 3
+BEAT_MIN_INTERVAL_MS = 100
+
+
+class BeatDetector:
+    """Streaming beat detector over one or more FFT bin bands.
+
+    Each band's onset value (spectral flux or raw energy) goes into a fixed
+    NumPy ring buffer with a running sum, so an update costs the same
+    whatever the history length. A beat fires when any band rises above
+    its running mean times `threshold`.
+    """
+
+    def __init__(self, bands: Sequence[Tuple[int, int]], history: int = 50,
+                 threshold: float = 1.3, decay: float = 0.95, onset: str = "flux",
+                 max_intensity: float = 3.0):
+        if onset not in ("flux", "energy"):
+            raise ValueError(f"unknown onset mode: {onset!r}")
+        self.band_starts = np.array([band[0] for band in bands])
+        self.band_ends = np.array([band[1] for band in bands])
+        self.threshold = threshold
+        self.decay = decay
+        self.onset = onset
+        self.max_intensity = max_intensity
+
+        self.history = np.zeros((max(1, history), len(bands)))
+        self.history_sum = np.zeros(len(bands))
+        self.position = 0
+        self.count = 0
+        self.previous = None
+
+        self.current_beat_energy = 0.0
+        self.last_beat_time = 0
+
+    @classmethod
+    def from_config(cls, config: VisualizerConfig) -> "BeatDetector":
+        return cls(beat_bands(config), config.beat_history_frames, config.beat_threshold,
+                   config.beat_decay, config.beat_onset, config.beat_max_intensity)
+
+    def onsets(self, fft_data: np.ndarray) -> np.ndarray:
+        """Onset value of every band for one frame."""
+        fft_data = np.asarray(fft_data, dtype=np.float64)
+        if self.onset == "flux":
+            previous = self.previous
+            if previous is None or len(previous) != len(fft_data):
+                previous = fft_data
+            self.previous = fft_data.copy()
+            fft_data = np.maximum(fft_data - previous, 0)
+        return band_sums(fft_data, self.band_starts, self.band_ends)
+
+    def update(self, fft_data: np.ndarray, current_time: float) -> Tuple[bool, float]:
+        """Feed one frame; returns (is_beat, intensity) like detect_beat."""
+        values = self.onsets(fft_data)
+
+        self.history_sum += values - self.history[self.position]
+        self.history[self.position] = values
+        self.position = (self.position + 1) % len(self.history)
+        self.count = min(self.count + 1, len(self.history))
+        if self.position == 0:
+            # Resync once per lap so float error in the running sum can't build up
+            self.history_sum = self.history.sum(axis=0)
+        avg = self.history_sum / self.count
+
+        self.current_beat_energy *= self.decay
+
+        is_beat = False
+        intensity = 1.0
+        over = values > avg * self.threshold
+        if over.any() and current_time - self.last_beat_time > BEAT_MIN_INTERVAL_MS:
+            is_beat = True
+            self.last_beat_time = current_time
+            intensity = min(float(np.max(values[over] / avg[over])), self.max_intensity)
+            self.current_beat_energy = intensity
+
+        return is_beat, max(intensity, self.current_beat_energy)
+
 
+class LightningBoltPool:
+    """Fixed-capacity pool of lightning bolts stored as NumPy arrays.
 
-class LightningBolt:
-    def __init__(self, angle: float, intensity: float = 1.0, screen_size: Tuple[int, int] = (900, 865)):
-        self.angle = angle
+    Each slot holds one bolt (angle, length, lifetime, alpha, width,
+    flicker, color) and up to MAX_BRANCHES branches. Spawning, aging and
+    zigzag geometry work on all live bolts at once, and nothing is
+    allocated per bolt.
+    """
+    MAX_LIFETIME = 15
+    MAX_BRANCHES = 3
+    BRANCH_SEGMENTS = 6
+    LAYERS = 3
+
+    def __init__(self, capacity: int = 64):
+        self.capacity = capacity
+        self.angle = np.zeros(capacity)
+        self.length = np.zeros(capacity)
+        self.lifetime = np.zeros(capacity, dtype=np.int64)
+        self.alpha = np.zeros(capacity)
+        self.width = np.zeros(capacity)
+        self.flicker = np.zeros(capacity)
+        self.color = np.zeros((capacity, 3), dtype=np.int64)
+        self.branch_angle = np.zeros((capacity, self.MAX_BRANCHES))
+        self.branch_length = np.zeros((capacity, self.MAX_BRANCHES))
+        self.branch_count = np.zeros(capacity, dtype=np.int64)
+        # Spawn order, so results never depend on which slot a bolt landed in
+        self.serial = np.zeros(capacity, dtype=np.int64)
+        self.next_serial = 0
+        self.layers = self.LAYERS
+
+    def clear(self):
+        self.lifetime[:] = 0
+
+    def spawn(self, count: int, intensity: float, screen_size: Tuple[int, int],
+              rng: np.random.Generator):
+        """Start up to `count` bolts at random angles; extras are dropped when full."""
+        slots = np.flatnonzero(self.lifetime <= 0)[:count]
+        n = len(slots)
+        if n == 0:
+            return
+
+        self.serial[slots] = self.next_serial + np.arange(n)
+        self.next_serial += n
+        angle = rng.uniform(0, 360, n)
         # Scale length based on screen size
-        max_length = min(screen_size[0], screen_size[1] * 0.75)  # Use 60% of screen size
-        self.length = random.randint(int(max_length), int(max_length))
-        self.lifetime = random.randint(5, 15)
-        self.width = random.uniform(0.15, 0.25) * intensity
-        self.alpha = 255 * intensity
-        self.branches = self._generate_branches(intensity)
-        self.flicker_state = random.random()
-        self.color = self._generate_color(intensity)
-
-
-    def _generate_color(self, intensity: float) -> Tuple[int, int, int]:
-        base_color = (217, 217, 217)
-        variation = random.randint(-100, 100)
-        color = tuple(max(0, min(255, int((c + variation) * intensity))) for c in base_color)
-        return color
-
-
-    def _generate_branches(self, intensity: float) -> List[Tuple[float, float, float]]:
-        branches = []
-        num_branches = random.randint(2, 3 if intensity > 1.5 else 2)
-        
-        for _ in range(num_branches):
-            # Reduce angle variance to keep branches more contained
-            angle_variance = random.uniform(-45, 45) * intensity
-            branches.append((
-                self.angle + angle_variance,
-                self.length * random.uniform(0.5, 1) * intensity,  # Shorter branches
-                random.uniform(0.3, 0.7)  # Start branches further along main bolt
-            ))
-        return branches
-
-
-    def update(self) -> bool:
-        self.lifetime -= 1
-        self.flicker_state = random.random()
-        self.alpha = int((self.lifetime * 255) // 15 * (0.7 + 0.3 * self.flicker_state))
-        return self.lifetime > 0
-
-    def _draw_lightning_segment(self, surface: pygame.Surface, start_pos: Tuple[int, int], 
-                              end_pos: Tuple[int, int], is_branch: bool = False):
-        points = generate_lightning_points(start_pos, end_pos, 
-                                        num_segments=6 if is_branch else 10)
-        
-        core_color = (*self.color, self.alpha)
-        
-        layers = 3 if is_branch else 4
-        for layer in range(layers):
-            width = (self.width * (0.6 if is_branch else 1.0)) * (5 - layer)
-            alpha = int(self.alpha * (0.8 ** layer) * self.flicker_state)
-            current_color = (*self.color, alpha)
-            
-            for i in range(len(points) - 1):
-                pygame.draw.line(surface, current_color,
-                               points[i], points[i + 1],
-                               int(width))
-                
-                if not is_branch and random.random() < 0.2:
-                    offset = random.uniform(-20, 20)
-                    offshoot_end = (
-                        int(points[i][0] + offset),
-                        int(points[i][1] + offset)
-                    )
-                    pygame.draw.line(surface, current_color,
-                                   points[i], offshoot_end,
-                                   int(width * 0.5))
+        length = int(min(screen_size[0], screen_size[1] * 0.75))
+        self.angle[slots] = angle
+        self.length[slots] = length
+        self.lifetime[slots] = rng.integers(5, self.MAX_LIFETIME + 1, n)
+        self.width[slots] = rng.uniform(0.15, 0.25, n) * intensity
+        self.alpha[slots] = 255 * intensity
+        self.flicker[slots] = rng.random(n)
+
+        base_color = 217
+        variation = rng.integers(-100, 101, n)
+        gray = np.clip(((base_color + variation) * intensity).astype(np.int64), 0, 255)
+        self.color[slots] = gray[:, np.newaxis]
+
+        # Reduce angle variance to keep branches more contained
+        max_branches = 3 if intensity > 1.5 else 2
+        self.branch_count[slots] = rng.integers(2, max_branches + 1, n)
+        self.branch_angle[slots] = (angle[:, np.newaxis]
+                                    + rng.uniform(-45, 45, (n, self.MAX_BRANCHES)) * intensity)
+        self.branch_length[slots] = (length * rng.uniform(0.5, 1, (n, self.MAX_BRANCHES))
+                                     * intensity)
+
+    def live_bolts(self) -> np.ndarray:
+        """Slots of live bolts, oldest first."""
+        bolts = np.flatnonzero(self.lifetime > 0)
+        return bolts[np.argsort(self.serial[bolts])]
+
+    def update(self, rng: np.random.Generator):
+        """Age every live bolt by one frame and re-roll its flicker."""
+        bolts = self.live_bolts()
+        self.lifetime[bolts] -= 1
+        self.flicker[bolts] = rng.random(len(bolts))
+        self.alpha[bolts] = (((self.lifetime[bolts] * 255) // self.MAX_LIFETIME)
+                             * (0.7 + 0.3 * self.flicker[bolts]))
+
+    def draw(self, surface: pygame.Surface, center: Tuple[int, int],
+             screen_size: Tuple[int, int], rng: np.random.Generator):
+        """Draw every live bolt."""
+        bolts = self.live_bolts()
+        if len(bolts) == 0:
+            return
+
+        # One row per live branch
+        has_branch = np.arange(self.MAX_BRANCHES) < self.branch_count[bolts, np.newaxis]
+        bolt_ids = np.broadcast_to(bolts[:, np.newaxis], has_branch.shape)[has_branch]
+        branch_radians = np.radians(self.branch_angle[bolts][has_branch])
+        max_radius = min(screen_size[0], screen_size[1]) * 0.99
+        scaled_length = np.minimum(self.branch_length[bolts][has_branch], max_radius)
+
+        end_x = (center[0] + scaled_length * np.cos(branch_radians)).astype(np.int64)
+        end_y = (center[1] + scaled_length * np.sin(branch_radians)).astype(np.int64)
+        ends = np.stack((np.clip(end_x, 0, screen_size[0]),
+                         np.clip(end_y, 0, screen_size[1])), axis=-1)
+        starts = np.broadcast_to(np.array(center), ends.shape)
+        paths, keep = generate_lightning_paths(starts, ends, self.BRANCH_SEGMENTS, rng)
+
+        draw_lines = pygame.draw.lines
+        for path, path_keep, bolt in zip(paths, keep, bolt_ids.tolist()):
+            points = path[path_keep].tolist()
+            color = self.color[bolt].tolist()
+            for layer in range(self.layers):
+                width = int(self.width[bolt] * 0.6 * (5 - layer))
+                if width < 1:
+                    continue
+                alpha = int(self.alpha[bolt] * (0.8 ** layer) * self.flicker[bolt])
+                draw_lines(surface, (*color, alpha), False, points, width)
+
+
+class BandMapper:
+    """Reduces linear FFT bins to log- or mel-spaced bands for drawing.
+
+    The first bin of every band is worked out once per chunk size and
+    sample rate; each frame is then a single np.maximum.reduceat. Optional
+    smoothing blends in the previous frame, and decay lets peaks fall
+    back gradually instead of dropping at once.
+    """
+
+    def __init__(self, chunk_size: int, sample_rate: int, num_bands: int, scale: str = "log",
+                 min_freq: float = 30.0, smoothing: float = 0.0, decay: float = 0.0):
+        self.starts = band_starts(chunk_size, sample_rate, num_bands, scale, min_freq)
+        self.num_bins = chunk_size // 2 + 1
+        self.smoothing = smoothing
+        self.decay = decay
+        self.values: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_config(cls, config: VisualizerConfig, sample_rate: int) -> Optional["BandMapper"]:
+        if config.band_scale is None:
+            return None
+        return cls(config.chunk_size, sample_rate, config.num_bands, config.band_scale,
+                   config.band_min_freq, config.band_smoothing, config.band_decay)
+
+    def apply(self, fft_data: np.ndarray) -> np.ndarray:
+        bands = np.maximum.reduceat(np.asarray(fft_data, dtype=np.float64), self.starts)
+        if self.values is not None and (self.smoothing or self.decay):
+            bands = self.values * self.smoothing + bands * (1 - self.smoothing)
+            bands = np.maximum(bands, self.values * self.decay)
+        self.values = bands
+        return bands
+
+
+class FrameCompositor:
+    """Layer surfaces for one window size, reused every frame.
+
+    Rebuilt only when the window size or blur scale changes. The blur
+    scales into preallocated surfaces. The blurred layer covers the whole
+    window every frame, so frames are always presented with a full flip.
+    """
+
+    def __init__(self, size: Tuple[int, int], blur_scale: int):
+        self.size = size
+        self.blur_scale = max(1, blur_scale)
+        width, height = size
+        self.layer = pygame.Surface(size, pygame.SRCALPHA)
+        self.glow = pygame.Surface(size, pygame.SRCALPHA)
+        self.glow.fill((0, 0, 0, 10))
+        self.small = pygame.Surface(
+            (max(1, width // self.blur_scale), max(1, height // self.blur_scale)),
+            pygame.SRCALPHA
+        )
+        self.blurred = pygame.Surface(size, pygame.SRCALPHA)
+
+    def blur(self, surface: pygame.Surface) -> pygame.Surface:
+        pygame.transform.smoothscale(surface, self.small.get_size(), self.small)
+        pygame.transform.smoothscale(self.small, self.size, self.blurred)
+        return self.blurred
+
+    def present(self):
+        pygame.display.flip()
+
+
+class CircleStamps:
+    """Filled circles pre-rendered once per (radius, color) and blitted in one call.
+
+    A frame only uses a few hundred distinct circles out of thousands of
+    points, so each point becomes a lookup into this cache plus one entry
+    of a single `surface.blits` call. The cache is cleared when it grows
+    past `capacity` stamps.
+    """
+
+    def __init__(self, capacity: int = 2048):
+        self.capacity = capacity
+        self.stamps = {}
+
+    def stamp(self, radius: int, color: int) -> pygame.Surface:
+        """Circle of `radius` in packed 0xRRGGBB `color`, centered at (radius, radius)."""
+        key = (radius, color)
+        stamp = self.stamps.get(key)
+        if stamp is None:
+            if len(self.stamps) >= self.capacity:
+                self.stamps.clear()
+            stamp = pygame.Surface((2 * radius + 1, 2 * radius + 1), pygame.SRCALPHA)
+            pygame.draw.circle(stamp, ((color >> 16) & 255, (color >> 8) & 255, color & 255),
+                               (radius, radius), radius, 0)
+            # RLE-encoded, blitting copies the opaque runs instead of blending every pixel
+            stamp.set_alpha(255, pygame.RLEACCEL)
+            self.stamps[key] = stamp
+        return stamp
+
+    def draw(self, surface: pygame.Surface, positions: np.ndarray, colors: np.ndarray,
+             radii: np.ndarray):
+        """Draw circles in order, as pygame.draw.circle would one by one."""
+        visible = radii >= 1
+        positions, colors, radii = positions[visible], colors[visible], radii[visible]
+        if not len(radii):
+            return
+        packed = (colors[:, 0] << 16) | (colors[:, 1] << 8) | colors[:, 2]
+        keys, which = np.unique(radii << 24 | packed, return_inverse=True)
+        stamps = [self.stamp(key >> 24, key & 0xFFFFFF) for key in keys.tolist()]
+        corners = (positions - radii[:, np.newaxis]).tolist()
+        surface.blits(zip(map(stamps.__getitem__, which.tolist()), corners), doreturn=False)
+
+
+class AudioAnalyzer:
+    """Reads and FFTs the audio file on a worker thread, ahead of playback.
+
+    Frames go into a fixed ring buffer keyed by their starting sample
+    offset. The render loop asks for the frame at the mixer's current
+    position and never waits on file I/O.
+    """
+
+    def __init__(self, audio_file: str, chunk_size: int, capacity: int = 64):
+        self.chunk_size = chunk_size
+        self.capacity = max(1, capacity)
+        self.reader = WavReader(audio_file)
+        self.sample_rate = self.reader.sample_rate
+
+        self.frames = np.zeros((self.capacity, chunk_size // 2 + 1))
+        self.offsets = np.full(self.capacity, -1, dtype=np.int64)
+        self.produced = 0
+        self.requested = 0
+        self.finished = False
+
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="audio-analyzer", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if self._thread.is_alive():
+            self._thread.join()
+        self.reader.close()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopped and self.produced - self.requested >= self.capacity:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+
+            start = self.produced * self.chunk_size
+            if start >= self.reader.num_frames:
+                with self._cond:
+                    self.finished = True
+                return
+
+            fft_data = normalized_spectrum(self.reader.window(start, self.chunk_size), self.chunk_size)
+            slot = self.produced % self.capacity
+            with self._cond:
+                self.frames[slot] = fft_data
+                self.offsets[slot] = self.produced * self.chunk_size
+                self.produced += 1
+
+    def frame_at(self, sample_offset: int) -> np.ndarray:
+        """Return the FFT frame containing sample_offset.
+
+        If the worker has not reached that offset yet, the newest frame is
+        returned; if the frame was already overwritten, a silent one is.
+        """
+        index = max(0, sample_offset // self.chunk_size)
+        with self._cond:
+            self.requested = index
+            self._cond.notify()
+            if self.produced == 0:
+                return np.zeros(self.frames.shape[1])
+
+            index = min(index, self.produced - 1)
+            slot = index % self.capacity
+            if self.offsets[slot] != index * self.chunk_size:
+                return np.zeros(self.frames.shape[1])
+            return self.frames[slot].copy()
+
+
+class TrackAnalysis:
+    """Normalized spectrogram and beat track for a whole audio file.
+
+    Computed once with framed FFTs over the full signal and cached as
+    memory-mapped .npy files, keyed by the file's content hash and the
+    config fields that affect the result.
+    """
+
+    def __init__(self, spectrogram: np.ndarray, beats: np.ndarray,
+                 sample_rate: int, chunk_size: int):
+        self.spectrogram = spectrogram
+        self.beats = beats
+        self.sample_rate = sample_rate
+        self.chunk_size = chunk_size
+
+    @classmethod
+    def load_or_compute(cls, audio_file: str, config: VisualizerConfig) -> "TrackAnalysis":
+        cache_dir = config.analysis_cache_dir or os.path.join(
+            os.path.dirname(os.path.abspath(audio_file)), ".visualizer_cache"
+        )
+        os.makedirs(cache_dir, exist_ok=True)
+        key = cls._cache_key(audio_file, config)
+        spectrogram_path = os.path.join(cache_dir, f"{key}.spectrogram.npy")
+        beats_path = os.path.join(cache_dir, f"{key}.beats.npy")
+        meta_path = os.path.join(cache_dir, f"{key}.json")
+
+        if not (os.path.exists(spectrogram_path) and os.path.exists(beats_path)
+                and os.path.exists(meta_path)):
+            cls._compute(audio_file, config, spectrogram_path, beats_path, meta_path)
+
+        with open(meta_path) as f:
+            meta = json.load(f)
+        return cls(
+            np.load(spectrogram_path, mmap_mode='r'),
+            np.load(beats_path, mmap_mode='r'),
+            meta["sample_rate"],
+            config.chunk_size,
+        )
+
+    @staticmethod
+    def _cache_key(audio_file: str, config: VisualizerConfig) -> str:
+        digest = hashlib.sha256()
+        with open(audio_file, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        settings = json.dumps({
+            "version": ANALYSIS_VERSION,
+            "chunk_size": config.chunk_size,
+            "beat_bands": [list(band) for band in beat_bands(config)],
+            "beat_onset": config.beat_onset,
+            "beat_history_frames": config.beat_history_frames,
+            "beat_max_intensity": config.beat_max_intensity,
+            "beat_threshold": config.beat_threshold,
+            "beat_decay": config.beat_decay,
+        }, sort_keys=True)
+        digest.update(settings.encode())
+        return digest.hexdigest()[:32]
+
+    @staticmethod
+    def _compute(audio_file: str, config: VisualizerConfig,
+                 spectrogram_path: str, beats_path: str, meta_path: str):
+        chunk_size = config.chunk_size
+        reader = WavReader(audio_file)
+        sample_rate = reader.sample_rate
+        num_frames = max(1, -(-reader.num_frames // chunk_size))
+
+        # Write straight into the cache file, a block of frames at a time
+        tmp_spectrogram = spectrogram_path + ".tmp"
+        spectrogram = np.lib.format.open_memmap(
+            tmp_spectrogram, mode='w+', dtype=np.float64,
+            shape=(num_frames, chunk_size // 2 + 1)
+        )
+        block_frames = 1024
+        for start in range(0, num_frames, block_frames):
+            count = min(block_frames, num_frames - start)
+            frames = reader.window(start * chunk_size, count * chunk_size).reshape(count, chunk_size)
+            spectrogram[start:start + count] = normalized_spectra(frames, chunk_size)
+        reader.close()
+
+        onsets = track_onsets(spectrogram, beat_bands(config), config.beat_onset)
+        frame_ms = chunk_size * 1000 / sample_rate
+        beats = compute_beat_track(onsets, frame_ms, config)
+
+        spectrogram.flush()
+        del spectrogram
+        tmp_beats = beats_path + ".tmp"
+        with open(tmp_beats, 'wb') as f:
+            np.save(f, beats)
+        with open(meta_path + ".tmp", 'w') as f:
+            json.dump({"sample_rate": sample_rate, "num_frames": num_frames}, f)
+        os.replace(tmp_spectrogram, spectrogram_path)
+        os.replace(tmp_beats, beats_path)
+        os.replace(meta_path + ".tmp", meta_path)
+
+    @property
+    def duration(self) -> float:
+        return len(self.spectrogram) * self.chunk_size / self.sample_rate
+
+    def frame_index(self, sample_offset: int) -> int:
+        return min(max(0, sample_offset // self.chunk_size), len(self.spectrogram) - 1)
+
+    def beat_between(self, last_index: int, index: int) -> Tuple[bool, float]:
+        """Beat state at index, counting beats in frames skipped since last_index."""
+        window = self.beats[max(0, last_index + 1):index + 1]
+        is_beat = bool(window["beat"].any())
+        return is_beat, float(self.beats["intensity"][index])
+
+
+@dataclass
+class QualityLevel:
+    num_bright_spirals: int
+    num_dark_spirals: int
+    bin_stride: int
+    blur_scale: int
+    lightning_layers: int
+
+
+class AdaptiveQuality:
+    """Picks a quality level from measured frame times and the fps budget.
+
+    Level 0 is the configured quality; the last level uses the configured
+    minimums, and the knobs are interpolated in between. Frames must stay
+    over `quality_down_ratio` of the budget for `quality_patience` frames
+    before stepping down, and under `quality_up_ratio` for four times as
+    long before stepping up. Every change restarts both counts, so the
+    level settles instead of oscillating.
+    """
+
+    def __init__(self, config: VisualizerConfig):
+        self.config = config
+        self.budget_ms = 1000 / config.fps
+        self.levels = self._build_levels(config)
+        self.level = 0
+        self.average_ms = None
+        self.slow_frames = 0
+        self.fast_frames = 0
+
+    @staticmethod
+    def _build_levels(config: VisualizerConfig) -> List[QualityLevel]:
+        steps = max(1, config.quality_levels - 1)
+
+        def knob(start: int, end: int, step: int) -> int:
+            return int(round(start + (end - start) * step / steps))
+
+        return [QualityLevel(
+            num_bright_spirals=knob(config.num_bright_spirals,
+                                    min(config.min_spirals, config.num_bright_spirals), step),
+            num_dark_spirals=knob(config.num_dark_spirals,
+                                  min(config.min_spirals, config.num_dark_spirals), step),
+            bin_stride=knob(1, max(1, config.max_bin_stride), step),
+            blur_scale=knob(config.blur_scale, max(config.blur_scale, config.max_blur_scale), step),
+            lightning_layers=knob(LightningBoltPool.LAYERS,
+                                  min(config.min_lightning_layers, LightningBoltPool.LAYERS), step),
+        ) for step in range(steps + 1)]
+
+    @property
+    def current(self) -> QualityLevel:
+        return self.levels[self.level]
+
+    def update(self, frame_ms: float) -> bool:
+        """Record one frame's work time; returns True when the level changed."""
+        if self.average_ms is None:
+            self.average_ms = frame_ms
+        self.average_ms += 0.1 * (frame_ms - self.average_ms)
+
+        if self.average_ms > self.budget_ms * self.config.quality_down_ratio:
+            self.slow_frames += 1
+            self.fast_frames = 0
+        elif self.average_ms < self.budget_ms * self.config.quality_up_ratio:
+            self.fast_frames += 1
+            self.slow_frames = 0
+        else:
+            self.slow_frames = self.fast_frames = 0
+
+        patience = self.config.quality_patience
+        if self.slow_frames >= patience and self.level < len(self.levels) - 1:
+            return self._step(1)
+        if self.fast_frames >= patience * 4 and self.level > 0:
+            return self._step(-1)
+        return False
+
+    def _step(self, direction: int) -> bool:
+        self.level += direction
+        self.slow_frames = self.fast_frames = 0
+        # Let the average reflect the new level before judging it
+        self.average_ms = None
+        return True
+
 
 class AudioVisualizer:
-    def __init__(self, audio_file: str, config: Optional[VisualizerConfig] = None):
+    def __init__(self, audio_file: str, config: Optional[VisualizerConfig] = None,
+                 offline: bool = False):
         self.config = config or VisualizerConfig()
-        pygame.mixer.init()
+        self.offline = offline
+        if offline:
+            # Render without a window or sound device
+            os.environ["SDL_VIDEODRIVER"] = "dummy"
+            os.environ["SDL_AUDIODRIVER"] = "dummy"
+        else:
+            pygame.mixer.init()
         pygame.init()
 
         # Set up the display with RESIZABLE
@@ -107,6 +650,11 @@ class AudioVisualizer:
         self.current_size = (self.config.width, self.config.height)
         self.is_fullscreen = False
 
+        self.quality_controller = AdaptiveQuality(self.config) if self.config.adaptive_quality else None
+        self.quality = QualityLevel(self.config.num_bright_spirals, self.config.num_dark_spirals,
+                                    1, self.config.blur_scale, LightningBoltPool.LAYERS)
+        self.blur_scale = self.quality.blur_scale
+
         # Create initial surfaces
         self._create_surfaces()
 
@@ -114,24 +662,30 @@ class AudioVisualizer:
         self.clock = pygame.time.Clock()
 
         self._setup_audio(audio_file)
-        self.spiral_rays = []
+        source = self.analysis if self.analysis is not None else self.analyzer
+        self.band_mapper = BandMapper.from_config(self.config, source.sample_rate)
+        self.lightning = LightningBoltPool(self.config.max_lightning_bolts)
+        self.circle_stamps = CircleStamps()
         self.hue_offset = 0.0
         self.time = 0
+        self.rng = np.random.default_rng()
+        self.profiler = None
+        if self.config.profile or self.config.profile_output:
+            self.profiler = FrameProfiler(self.config.profile_window)
 
-        self.energy_history = []
-        self.current_beat_energy = 0
-        self.last_beat_time = 0
+        self.beat_detector = BeatDetector.from_config(self.config)
         
         
     def _create_surfaces(self):
         """Create or recreate surfaces based on current window size."""
-        width, height = self.current_size
-        self.blur_surface = pygame.Surface((width, height), pygame.SRCALPHA)
-        self.blur_scale = 4
-        self.small_surface = pygame.Surface(
-            (width // self.blur_scale, height // self.blur_scale),
-            pygame.SRCALPHA
-        )
+        self.compositor = FrameCompositor(self.current_size, self.blur_scale)
+
+    def _apply_quality(self, quality: QualityLevel):
+        self.quality = quality
+        self.lightning.layers = quality.lightning_layers
+        if quality.blur_scale != self.blur_scale:
+            self.blur_scale = quality.blur_scale
+            self._create_surfaces()
 
     def _handle_resize(self, size):
         """Handle window resize event."""
@@ -170,75 +724,101 @@ class AudioVisualizer:
         return min(scale_x, scale_y)
         
     def apply_fast_blur(self, surface: pygame.Surface) -> pygame.Surface:
-        small_surface = pygame.transform.smoothscale(
-            surface, 
-            (surface.get_width() // self.blur_scale, surface.get_height() // self.blur_scale)
-        )
-        return pygame.transform.smoothscale(
-            small_surface, 
-            (surface.get_width(), surface.get_height())
-        )
-     
+        return self.compositor.blur(surface)
+
     def detect_beat(self, fft_data: np.ndarray) -> Tuple[bool, float]:
-        bass_range = slice(self.config.bass_freq_range[0], 
-                         min(self.config.bass_freq_range[1], len(fft_data)))
-        bass_energy = np.sum(fft_data[bass_range])
-        
-        self.energy_history.append(bass_energy)
-        if len(self.energy_history) > 50:
-            self.energy_history.pop(0)
-            
-        avg_energy = np.mean(self.energy_history) if self.energy_history else bass_energy
-        
-        self.current_beat_energy *= self.config.beat_decay
-        
-        is_beat = False
-        intensity = 1.0
-        if bass_energy > avg_energy * self.config.beat_threshold:
-            current_time = pygame.time.get_ticks()
-            if current_time - self.last_beat_time > 100:  
-                is_beat = True
-                self.last_beat_time = current_time
-                intensity = bass_energy / avg_energy
-                self.current_beat_energy = intensity
-        
-        return is_beat, max(intensity, self.current_beat_energy)
+        if self.analysis is not None and self.frame_index >= 0:
+            result = self.analysis.beat_between(self.last_beat_index, self.frame_index)
+            self.last_beat_index = self.frame_index
+            return result
+
+        return self.beat_detector.update(fft_data, pygame.time.get_ticks())
 
         
     def _setup_audio(self, audio_file: str):
+        self.analysis = None
+        self.analyzer = None
+        self.frame_index = -1
+        self.last_beat_index = -1
+        if self.config.use_analysis_cache or self.offline:
+            self.analysis = TrackAnalysis.load_or_compute(audio_file, self.config)
+            if self.offline:
+                return
+        else:
+            self.analyzer = AudioAnalyzer(audio_file, self.config.chunk_size,
+                                          self.config.analysis_ahead_frames)
+            self.analyzer.start()
         pygame.mixer.music.load(audio_file)
         pygame.mixer.music.play()
-        self.wave_file = wave.open(audio_file, 'rb')
 
-    def get_fft_data(self) -> np.ndarray:
-        data = self.wave_file.readframes(self.config.chunk_size)
-        if len(data) < self.config.chunk_size * self.wave_file.getsampwidth():
-            self.wave_file.rewind()
-            data = self.wave_file.readframes(self.config.chunk_size)
-            
-        audio_data = np.frombuffer(data, dtype=np.int16)
-        fft_data = np.abs(np.fft.rfft(audio_data)) / self.config.chunk_size
-        return fft_data / np.max(fft_data) if np.max(fft_data) > 0 else np.zeros_like(fft_data)
+    def get_fft_data(self) -> Optional[np.ndarray]:
+        """FFT frame for the sample the mixer is playing, or None once playback ends."""
+        position_ms = pygame.mixer.music.get_pos()
+        if position_ms < 0 or not pygame.mixer.music.get_busy():
+            return None
+        if self.analysis is not None:
+            sample_offset = position_ms * self.analysis.sample_rate // 1000
+            self.frame_index = self.analysis.frame_index(sample_offset)
+            return self.analysis.spectrogram[self.frame_index]
+        sample_offset = position_ms * self.analyzer.sample_rate // 1000
+        return self.analyzer.frame_at(sample_offset)
 
 
+    def draw_offline_frame(self, frame_number: int, fps: int, seed: int = 0):
+        """Draw frame `frame_number` of a fixed-rate render.
+
+        All random state is reseeded from (seed, frame_number), so a frame
+        only depends on the frames before it that still have live bolts.
+        """
+        sample_rate = self.analysis.sample_rate
+        self.last_beat_index = (self.analysis.frame_index((frame_number - 1) * sample_rate // fps)
+                                if frame_number > 0 else -1)
+        self.frame_index = self.analysis.frame_index(frame_number * sample_rate // fps)
+        self.hue_offset = (frame_number * 0.005) % 1.0
+        self.time = frame_number * 0.05
+
+        self.rng = np.random.default_rng([seed, frame_number])
+        self.draw_frame(self.analysis.spectrogram[self.frame_index])
+
+    def _stage(self, name: str):
+        """Timing context for one frame stage; a shared no-op when not profiling."""
+        return self.profiler.stage(name) if self.profiler is not None else NO_PROFILE
+
+    def toggle_profiler_hud(self):
+        if self.profiler is None:
+            self.profiler = FrameProfiler(self.config.profile_window)
+        self.profiler.show_hud = not self.profiler.show_hud
+
     def draw_frame(self, fft_data: np.ndarray):
-        self.blur_surface.fill((0, 0, 0, 0))
-        self.small_surface.fill((0, 0, 0, 0))
-        
-        self._draw_background(self.blur_surface)
-        self._draw_glow_effect(self.blur_surface)
-        self._draw_spirals(fft_data, self.blur_surface)
+        layer = self.compositor.layer
+        with self._stage("_draw_background"):
+            self._draw_background(layer)
+        with self._stage("_draw_glow_effect"):
+            self._draw_glow_effect(layer)
+        with self._stage("_draw_spirals"):
+            self._draw_spirals(self._spiral_data(fft_data), layer)
         
         # Aplicar blur
-        blurred = self.apply_fast_blur(self.blur_surface)
+        with self._stage("apply_fast_blur"):
+            blurred = self.apply_fast_blur(layer)
         
         self.screen.blit(blurred, (0, 0))
-        self._draw_lightning_bolts(fft_data)  
+        with self._stage("_draw_lightning_bolts"):
+            self._draw_lightning_bolts(fft_data)
+        if self.profiler is not None and self.profiler.show_hud:
+            self.profiler.draw_hud(self.screen)
         
         self.hue_offset = (self.hue_offset + 0.005) % 1.0
         self.time += 0.05
-        pygame.display.flip()
+        with self._stage("flip"):
+            self.compositor.present()
+
 
+    def _spiral_data(self, fft_data: np.ndarray) -> np.ndarray:
+        """What the spirals draw: the FFT bins, or their bands if band_scale is set."""
+        if self.band_mapper is None:
+            return fft_data
+        return self.band_mapper.apply(fft_data)
 
     def _draw_background(self, surface: pygame.Surface):
         background_hue = (self.hue_offset + 10) % 10.0
@@ -251,113 +831,89 @@ class AudioVisualizer:
         surface.fill(bg_color)
 
     def _draw_glow_effect(self, surface: pygame.Surface):
-        temp = pygame.Surface((self.config.width, self.config.height), pygame.SRCALPHA)
-        temp.fill((0, 0, 0, 10))
-        surface.blit(temp, (0, 0))
+        surface.blit(self.compositor.glow, (0, 0))
 
     def _draw_spirals(self, fft_data: np.ndarray, surface: pygame.Surface):
         center = (self.current_size[0] // 2, self.current_size[1] // 2)
         max_radius = min(self.current_size[0], self.current_size[1]) // 2.1
+
+        stride = self.quality.bin_stride
+        if stride > 1:
+            # Draw fewer points, keeping the loudest bin of each group
+            usable = len(fft_data) // stride * stride
+            fft_data = np.asarray(fft_data[:usable]).reshape(-1, stride).max(axis=1)
         
         self._draw_spiral_type(fft_data, center, max_radius, 
-                             self.config.num_bright_spirals, True, surface)
+                             self.quality.num_bright_spirals, True, surface)
         self._draw_spiral_type(fft_data, center, max_radius, 
-                             self.config.num_dark_spirals, False, surface)
-        
-        
-    def _draw_spiral_type(self, fft_data: np.ndarray, center: Tuple[int, int], 
-                         max_radius: float, num_spirals: int, bright: bool, 
+                             self.quality.num_dark_spirals, False, surface)
+
+    def _draw_spiral_type(self, fft_data: np.ndarray, center: Tuple[int, int],
+                         max_radius: float, num_spirals: int, bright: bool,
                          surface: pygame.Surface):
-        row_spacing = max_radius // (num_spirals // 2)
-        for spiral in range(num_spirals):
-            spiral_offset = (spiral * row_spacing * (1.5 if bright else 3))
-            if not bright:
-                spiral_offset += row_spacing * self.config.num_bright_spirals
-            
-            radius = max_radius + spiral_offset
-            self._draw_single_spiral(fft_data, center, radius, spiral_offset, bright, surface)
-
-    def _draw_single_spiral(self, fft_data: np.ndarray, center: Tuple[int, int], 
-                          radius: float, spiral_offset: float, bright: bool, surface: pygame.Surface):
-        for i, amplitude in enumerate(fft_data):
-            angle = (i * (360 / len(fft_data))) + (self.hue_offset * 360) + spiral_offset * 0.5
-            pos = self._calculate_point_position(center, angle, amplitude * radius)
-            
-            if bright:
-                self._draw_bright_point(pos, i, len(fft_data), amplitude, spiral_offset, surface)
-            else:
-                self._draw_dark_point(pos, i, len(fft_data), amplitude, spiral_offset, surface)
-
-    def _calculate_point_position(self, center: Tuple[int, int], angle: float, 
-                                radius: float) -> Tuple[int, int]:
-        # Scale radius based on current window size
-        scale_factor = min(self.current_size[0] / self.config.width,
-                         self.current_size[1] / self.config.height)
-        scaled_radius = radius * scale_factor
-        
-        radians = np.radians(angle)
-        return (
-            int(center[0] + scaled_radius * np.cos(radians)),
-            int(center[1] + scaled_radius * np.sin(radians))
+        """Draw every spiral of one type, computing all points in a single batch."""
+        if num_spirals <= 0 or len(fft_data) == 0:
+            return
+        positions, colors, radii = self._spiral_points(
+            fft_data, center, max_radius, num_spirals, bright
         )
+        self.circle_stamps.draw(surface, positions, colors, radii)
 
+    def _spiral_offsets(self, max_radius: float, num_spirals: int, bright: bool) -> np.ndarray:
+        row_spacing = max_radius // max(1, num_spirals // 2)
+        offsets = np.arange(num_spirals) * (row_spacing * (1.5 if bright else 3))
+        if not bright:
+            offsets += row_spacing * self.quality.num_bright_spirals
+        return offsets
 
-    def _draw_bright_point(self, pos: Tuple[int, int], i: int, total_points: int, 
-                          amplitude: float, spiral_offset: float, surface: pygame.Surface):
-        color = colorsys.hsv_to_rgb(
-            (self.hue_offset + (i / total_points) + spiral_offset) % 1.0,
-            1,
-            min(amplitude * 1.5, 1)  
-        )
-        color = tuple(int(c * 255) for c in color)      
-        
-        core_color = tuple(min(c + 100, 255) for c in color)
-        pygame.draw.circle(surface, core_color, pos, int(15 + amplitude * 50), 0)
-
-    def _draw_dark_point(self, pos: Tuple[int, int], i: int, total_points: int, 
-                        amplitude: float, spiral_offset: float, surface: pygame.Surface):
-        color = colorsys.hsv_to_rgb(
-            (self.hue_offset + (i / total_points) + spiral_offset) % 1.0,
-            0.3,
-            0.2 if random.random() > 0.3 else 0
-        )
-        color = tuple(int(c * 115) for c in color)
-        pygame.draw.circle(surface, color, pos, int(5 + amplitude * 15), 0)
+    def _spiral_points(self, fft_data: np.ndarray, center: Tuple[int, int],
+                       max_radius: float, num_spirals: int,
+                       bright: bool) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Positions, colors and radii for all bins of all spirals of one type.
 
+        Arrays are flattened spiral-major, so drawing them in order matches
+        drawing each spiral bin by bin.
+        """
+        num_points = len(fft_data)
+        amplitude = np.asarray(fft_data, dtype=np.float64)[np.newaxis, :]
+        spiral_offset = self._spiral_offsets(max_radius, num_spirals, bright)[:, np.newaxis]
+        bins = np.arange(num_points)
+
+        # Positions
+        radius = max_radius + spiral_offset
+        angle = (bins * (360 / num_points)) + (self.hue_offset * 360) + spiral_offset * 0.5
+        radians = np.radians(angle)
+        scaled_radius = amplitude * radius * self.get_scaling_factor()
+        x = (center[0] + scaled_radius * np.cos(radians)).astype(np.int64)
+        y = (center[1] + scaled_radius * np.sin(radians)).astype(np.int64)
+        positions = np.stack((x, y), axis=-1).reshape(-1, 2)
+
+        # Colors and circle radii
+        hue = (self.hue_offset + (bins / num_points) + spiral_offset) % 1.0
+        if bright:
+            value = np.minimum(amplitude * 1.5, 1)
+            rgb = hsv_to_rgb_array(hue, 1, value)
+            colors = np.minimum((rgb * 255).astype(np.int64) + 100, 255)
+            radii = (15 + amplitude * 50).astype(np.int64)
+        else:
+            value = np.where(self.rng.random(hue.shape) > 0.3, 0.2, 0)
+            rgb = hsv_to_rgb_array(hue, 0.3, value)
+            colors = (rgb * 115).astype(np.int64)
+            radii = (5 + amplitude * 15).astype(np.int64)
+
+        radii = np.broadcast_to(radii, hue.shape)
+        return positions, colors.reshape(-1, 3), radii.reshape(-1)
 
     def _draw_lightning_bolts(self, fft_data: np.ndarray):
         is_beat, intensity = self.detect_beat(fft_data)
-        
+
         if is_beat:
-            num_bolts = random.randint(1, max(1, int(intensity)))
-            for _ in range(num_bolts):
-                angle = random.uniform(0, 360)
-                # Pass current screen size to LightningBolt constructor
-                self.spiral_rays.append(LightningBolt(angle, intensity, self.current_size))
-        
+            num_bolts = int(self.rng.integers(1, max(1, int(intensity)) + 1))
+            self.lightning.spawn(num_bolts, intensity, self.current_size, self.rng)
+
         center = (self.current_size[0] // 2, self.current_size[1] // 2)
-        self.spiral_rays = [bolt for bolt in self.spiral_rays if bolt.update()]
-        
-        for bolt in self.spiral_rays:
-            for branch in bolt.branches:
-                branch_angle, branch_length, branch_start = branch
-                start_pos = center
-                
-                branch_radians = np.radians(branch_angle)
-                max_radius = min(self.current_size[0], self.current_size[1]) * 0.99
-                scaled_length = min(branch_length, max_radius)
-                
-                end_pos = (
-                    int(start_pos[0] + scaled_length * np.cos(branch_radians)),
-                    int(start_pos[1] + scaled_length * np.sin(branch_radians))
-                )
-                
-                end_pos = (
-                    max(0, min(end_pos[0], self.current_size[0])),
-                    max(0, min(end_pos[1], self.current_size[1]))
-                )
-                
-                bolt._draw_lightning_segment(self.screen, start_pos, end_pos, is_branch=True)
+        self.lightning.update(self.rng)
+        self.lightning.draw(self.screen, center, self.current_size, self.rng)
 
     def run(self):
         try:
@@ -373,54 +929,197 @@ class AudioVisualizer:
                             self.toggle_fullscreen()
                         elif event.key == pygame.K_ESCAPE and self.is_fullscreen:
                             self.toggle_fullscreen()
+                        elif event.key == pygame.K_F3:
+                            self.toggle_profiler_hud()
 
-                fft_data = self.get_fft_data()
-                if fft_data is None:
-                    break
+                frame_start = time.perf_counter()
+                with self._stage("frame"):
+                    with self._stage("get_fft_data"):
+                        fft_data = self.get_fft_data()
+                    if fft_data is None:
+                        break
 
-                self.draw_frame(fft_data)
+                    self.draw_frame(fft_data)
+                if self.profiler is not None:
+                    self.profiler.end_frame()
+                if self.quality_controller is not None:
+                    if self.quality_controller.update((time.perf_counter() - frame_start) * 1000):
+                        self._apply_quality(self.quality_controller.current)
                 self.clock.tick(self.config.fps)
         finally:
             self.cleanup()
 
     def cleanup(self):
-        self.wave_file.close()
+        if self.profiler is not None and self.config.profile_output:
+            self.profiler.export(self.config.profile_output)
+        if self.analyzer is not None:
+            self.analyzer.stop()
         pygame.mixer.quit()
         pygame.quit()
 
-def generate_lightning_points(start_pos: Tuple[int, int], end_pos: Tuple[int, int], 
-                            num_segments: int = 10) -> List[Tuple[int, int]]:
-    points = [start_pos]
-    start_x, start_y = start_pos
-    end_x, end_y = end_pos
-    
-    dx = end_x - start_x
-    dy = end_y - start_y
-    dist = np.sqrt(dx*dx + dy*dy)
-    
-    for i in range(num_segments):
-        progress = (i + 1) / (num_segments + 1)
-        
-        zigzag_amount = (1 - progress) * dist * 0.2
-        
-        straight_x = start_x + dx * progress
-        straight_y = start_y + dy * progress
-        
-        angle = random.uniform(0, 2 * np.pi)
-        offset = random.uniform(-zigzag_amount, zigzag_amount)
-        x = straight_x + np.cos(angle) * offset
-        y = straight_y + np.sin(angle) * offset
-        
-        if random.random() < 0.3:
-            mid_x = (points[-1][0] + x) / 2 + random.uniform(-100, 100)
-            mid_y = (points[-1][1] + y) / 2 + random.uniform(-100, 100)
-            points.append((int(mid_x), int(mid_y)))
-            
-        points.append((int(x), int(y)))
-    
-    points.append(end_pos)
-    return points
+def generate_lightning_paths(starts: np.ndarray, ends: np.ndarray, num_segments: int,
+                             rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    """Zigzag points from every start to its end, for all paths at once.
+
+    Returns integer points of shape (paths, 2 * num_segments + 2, 2) laid out
+    as start, (detour, zigzag) per segment, end, plus a mask of which points
+    to draw: each detour point is only kept with probability 0.3.
+    """
+    num_paths = len(starts)
+    starts = np.asarray(starts, dtype=np.float64)
+    ends = np.asarray(ends, dtype=np.float64)
+    delta = ends - starts
+    dist = np.hypot(delta[:, 0], delta[:, 1])[:, np.newaxis]
+
+    progress = np.arange(1, num_segments + 1) / (num_segments + 1)
+    zigzag_amount = (1 - progress) * dist * 0.2
+    straight = starts[:, np.newaxis, :] + delta[:, np.newaxis, :] * progress[:, np.newaxis]
+
+    angle = rng.uniform(0, 2 * np.pi, (num_paths, num_segments))
+    offset = rng.uniform(-1, 1, (num_paths, num_segments)) * zigzag_amount
+    zigzag = straight + np.stack((np.cos(angle), np.sin(angle)), axis=-1) * offset[..., np.newaxis]
+    zigzag = zigzag.astype(np.int64)
+
+    # Detours sit between the previous zigzag point and this one
+    previous = np.concatenate((starts[:, np.newaxis, :].astype(np.int64), zigzag[:, :-1]), axis=1)
+    detour = ((previous + zigzag) / 2 + rng.uniform(-100, 100, zigzag.shape)).astype(np.int64)
+
+    points = np.empty((num_paths, 2 * num_segments + 2, 2), dtype=np.int64)
+    points[:, 0] = starts
+    points[:, 1:-1:2] = detour
+    points[:, 2:-1:2] = zigzag
+    points[:, -1] = ends
+
+    keep = np.ones(points.shape[:2], dtype=bool)
+    keep[:, 1:-1:2] = rng.random((num_paths, num_segments)) < 0.3
+    return points, keep
+
+def normalized_spectrum(audio_data: np.ndarray, chunk_size: int) -> np.ndarray:
+    fft_data = np.abs(np.fft.rfft(audio_data)) / chunk_size
+    peak = np.max(fft_data)
+    return fft_data / peak if peak > 0 else np.zeros_like(fft_data)
+
+def normalized_spectra(frames: np.ndarray, chunk_size: int) -> np.ndarray:
+    """normalized_spectrum for every row of a (num_frames, samples) array."""
+    fft_data = np.abs(np.fft.rfft(frames, axis=1)) / chunk_size
+    peak = fft_data.max(axis=1, keepdims=True)
+    return np.divide(fft_data, peak, out=np.zeros_like(fft_data), where=peak > 0)
+
+def beat_bands(config: VisualizerConfig) -> Tuple[Tuple[int, int], ...]:
+    return tuple(config.beat_bands or (config.bass_freq_range,))
+
+def band_sums(spectra: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Sum FFT bins [start, end) of every band along the last axis of spectra."""
+    num_bins = spectra.shape[-1]
+    cumulative = np.concatenate(
+        (np.zeros(spectra.shape[:-1] + (1,)), np.cumsum(spectra, axis=-1)), axis=-1
+    )
+    starts = np.minimum(starts, num_bins)
+    ends = np.clip(ends, starts, num_bins)
+    return cumulative[..., ends] - cumulative[..., starts]
+
+@functools.lru_cache(maxsize=16)
+def _band_starts(chunk_size: int, sample_rate: int, num_bands: int, scale: str,
+                 min_freq: float) -> Tuple[int, ...]:
+    num_bins = chunk_size // 2 + 1
+    nyquist = sample_rate / 2
+    min_freq = min(max(min_freq, sample_rate / chunk_size), nyquist)
+    if scale == "mel":
+        mel_edges = np.linspace(2595 * np.log10(1 + min_freq / 700),
+                                2595 * np.log10(1 + nyquist / 700), num_bands + 1)
+        edges = 700 * (10 ** (mel_edges / 2595) - 1)
+    elif scale == "log":
+        edges = np.geomspace(min_freq, nyquist, num_bands + 1)
+    else:
+        raise ValueError(f"unknown band scale: {scale!r}")
+
+    starts = np.floor(edges[:-1] * chunk_size / sample_rate).astype(np.int64)
+    # Low bands can be narrower than one bin; give each band its own first bin
+    offsets = np.arange(num_bands)
+    starts = np.maximum.accumulate(starts - offsets) + offsets
+    return tuple(starts[starts < num_bins].tolist())
+
+def band_starts(chunk_size: int, sample_rate: int, num_bands: int, scale: str = "log",
+                min_freq: float = 30.0) -> np.ndarray:
+    """First FFT bin of every band; bins below min_freq are left out."""
+    return np.array(_band_starts(chunk_size, sample_rate, num_bands, scale, float(min_freq)))
+
+def track_onsets(spectrogram: np.ndarray, bands: Sequence[Tuple[int, int]],
+                 onset: str) -> np.ndarray:
+    """BeatDetector.onsets for every frame of a spectrogram at once."""
+    spectrogram = np.asarray(spectrogram, dtype=np.float64)
+    if onset == "flux":
+        flux = np.zeros_like(spectrogram)
+        flux[1:] = np.maximum(np.diff(spectrogram, axis=0), 0)
+        spectrogram = flux
+    starts = np.array([band[0] for band in bands])
+    ends = np.array([band[1] for band in bands])
+    return band_sums(spectrogram, starts, ends)
+
+def compute_beat_track(onsets: np.ndarray, frame_ms: float,
+                       config: VisualizerConfig) -> np.ndarray:
+    """Replay BeatDetector over a whole track of per-band onset values.
+
+    Returns a structured array with a 'beat' flag and the 'intensity'
+    the detector would have reported for each frame.
+    """
+    num_frames = len(onsets)
+    frames = np.arange(num_frames)
+    history = max(1, config.beat_history_frames)
+
+    # Mean over the last `history` frames, current frame included
+    cumulative = np.concatenate((np.zeros((1, onsets.shape[1])), np.cumsum(onsets, axis=0)))
+    window_start = np.maximum(0, frames + 1 - history)
+    avg = ((cumulative[frames + 1] - cumulative[window_start])
+           / (frames + 1 - window_start)[:, np.newaxis])
+
+    over = onsets > avg * config.beat_threshold
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = np.where(over, onsets / avg, 0).max(axis=1)
+    ratio = np.minimum(ratio, config.beat_max_intensity)
+
+    # Only candidates need the sequential minimum-interval check
+    beat = np.zeros(num_frames, dtype=bool)
+    last_beat_ms = 0.0
+    for i in np.flatnonzero(over.any(axis=1)):
+        frame_time = i * frame_ms
+        if frame_time - last_beat_ms > BEAT_MIN_INTERVAL_MS:
+            beat[i] = True
+            last_beat_ms = frame_time
+
+    # Beat energy decays by beat_decay every frame after the most recent beat
+    last_beat = np.maximum.accumulate(np.where(beat, frames, -1))
+    has_beat = last_beat >= 0
+    beat_energy = np.zeros(num_frames)
+    beat_energy[has_beat] = (ratio[last_beat[has_beat]]
+                             * config.beat_decay ** (frames[has_beat] - last_beat[has_beat]))
+
+    track = np.zeros(num_frames, dtype=[("beat", "?"), ("intensity", "f8")])
+    track["beat"] = beat
+    track["intensity"] = np.maximum(np.where(beat, ratio, 1.0), beat_energy)
+    return track
+
+def hsv_to_rgb_array(h, s, v) -> np.ndarray:
+    """Vectorized colorsys.hsv_to_rgb; returns an array of shape (..., 3)."""
+    h, s, v = np.broadcast_arrays(
+        np.asarray(h, dtype=np.float64),
+        np.asarray(s, dtype=np.float64),
+        np.asarray(v, dtype=np.float64),
+    )
+    i = (h * 6.0).astype(np.int64)
+    f = (h * 6.0) - i
+    p = v * (1.0 - s)
+    q = v * (1.0 - s * f)
+    t = v * (1.0 - s * (1.0 - f))
+    i = i % 6
+
+    # Same sector table as colorsys, picked per element
+    r = np.choose(i, (v, q, p, p, t, v))
+    g = np.choose(i, (t, v, v, q, p, p))
+    b = np.choose(i, (p, p, t, v, v, q))
+    rgb = np.stack((r, g, b), axis=-1)
+    return np.where((s == 0.0)[..., np.newaxis], v[..., np.newaxis], rgb)
 
 if __name__ == "__main__":
-    visualizer = AudioVisualizer("sleepwalker.wav")
+    visualizer = AudioVisualizer(sys.argv[1] if len(sys.argv) > 1 else "sleepwalker.wav")
     visualizer.run()
\ No newline at end of file
@@ -0,0 +1,126 @@
+"""Memory-mapped WAV reader for the audio visualizer.
+
+The RIFF header is parsed once and the PCM data chunk is exposed as a
+read-only np.memmap, so reading a window is a slice of the file mapping
+rather than a readframes copy. Windows come back as mono float64 in
+[-1, 1], whatever the channel count or sample format (8/16/24/32-bit
+integer PCM, 32/64-bit float, including WAVE_FORMAT_EXTENSIBLE).
+"""
+import os
+import struct
+from typing import Optional
+
+import numpy as np
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+class WavReader:
+    def __init__(self, path: str):
+        self.path = path
+        self.format_tag: Optional[int] = None
+        data_offset = data_size = None
+
+        file_size = os.path.getsize(path)
+        with open(path, 'rb') as f:
+            riff, _, wave_id = struct.unpack('<4sI4s', f.read(12))
+            if riff != b'RIFF' or wave_id != b'WAVE':
+                raise ValueError(f"{path} is not a RIFF/WAVE file")
+
+            while True:
+                header = f.read(8)
+                if len(header) < 8:
+                    break
+                chunk_id, chunk_size = struct.unpack('<4sI', header)
+                if chunk_id == b'fmt ':
+                    self._parse_format(f.read(chunk_size))
+                    f.seek(chunk_size % 2, os.SEEK_CUR)
+                elif chunk_id == b'data':
+                    data_offset = f.tell()
+                    # Streaming writers may leave the size unset or too large
+                    data_size = min(chunk_size, file_size - data_offset)
+                    break
+                else:
+                    f.seek(chunk_size + chunk_size % 2, os.SEEK_CUR)
+
+        if self.format_tag is None:
+            raise ValueError(f"{path} has no fmt chunk")
+        if data_offset is None:
+            raise ValueError(f"{path} has no data chunk")
+
+        self.num_frames = data_size // self.block_align
+        shape = (self.num_frames, self.channels)
+        if self.sample_width == 3:
+            dtype, shape = np.uint8, shape + (3,)
+        elif self.format_tag == WAVE_FORMAT_IEEE_FLOAT:
+            dtype = {4: '<f4', 8: '<f8'}[self.sample_width]
+        else:
+            dtype = {1: np.uint8, 2: '<i2', 4: '<i4'}[self.sample_width]
+
+        if self.num_frames:
+            self.data = np.memmap(path, dtype=dtype, mode='r', offset=data_offset, shape=shape)
+        else:
+            self.data = np.zeros(shape, dtype=dtype)
+
+    def _parse_format(self, fmt: bytes):
+        (format_tag, self.channels, self.sample_rate, _,
+         self.block_align, bits_per_sample) = struct.unpack('<HHIIHH', fmt[:16])
+        if format_tag == WAVE_FORMAT_EXTENSIBLE and len(fmt) >= 26:
+            # The real format tag leads the SubFormat GUID
+            format_tag = struct.unpack('<H', fmt[24:26])[0]
+        self.sample_width = (bits_per_sample + 7) // 8
+
+        supported = (
+            (format_tag == WAVE_FORMAT_PCM and self.sample_width in (1, 2, 3, 4))
+            or (format_tag == WAVE_FORMAT_IEEE_FLOAT and self.sample_width in (4, 8))
+        )
+        if not supported or self.channels < 1:
+            raise ValueError(
+                f"unsupported WAV format {format_tag:#06x} with {bits_per_sample}-bit samples"
+            )
+        if self.block_align != self.channels * self.sample_width:
+            raise ValueError(f"unsupported WAV block alignment {self.block_align}")
+        self.format_tag = format_tag
+
+    @property
+    def duration(self) -> float:
+        return self.num_frames / self.sample_rate
+
+    def _to_mono(self, raw: np.ndarray) -> np.ndarray:
+        """Downmix and scale a slice of the mapping to float64 in [-1, 1]."""
+        if self.sample_width == 3:
+            # Assemble little-endian 24-bit samples and sign-extend from bit 23
+            raw = raw.astype(np.int32)
+            raw = (raw[..., 0] | (raw[..., 1] << 8) | (raw[..., 2] << 16)) << 8 >> 8
+            scale, offset = 1 / (1 << 23), 0.0
+        elif self.format_tag == WAVE_FORMAT_IEEE_FLOAT:
+            scale, offset = 1.0, 0.0
+        elif self.sample_width == 1:
+            scale, offset = 1 / 128, -1.0
+        else:
+            scale, offset = 1 / (1 << (8 * self.sample_width - 1)), 0.0
+
+        if self.channels == 1:
+            mono = raw[:, 0].astype(np.float64)
+        else:
+            mono = raw.mean(axis=1, dtype=np.float64)
+        mono *= scale
+        if offset:
+            mono += offset
+        return mono
+
+    def window(self, start: int, count: int) -> np.ndarray:
+        """`count` mono samples from sample offset `start`, zero-padded past either end."""
+        out = np.zeros(count)
+        first = max(start, 0)
+        last = min(start + count, self.num_frames)
+        if last > first:
+            out[first - start:last - start] = self._to_mono(self.data[first:last])
+        return out
+
+    def close(self):
+        # The mapping is released once no window still references it
+        self.data = np.zeros((0,) + self.data.shape[1:], dtype=self.data.dtype)
+        self.num_frames = 0
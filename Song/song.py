@@ -1,9 +1,79 @@
+import sys
+
 import pygame
-import time
 
-pygame.mixer.init()
-pygame.mixer.music.load("a.wav")  
-pygame.mixer.music.play()
-time.sleep(218) 
-pygame.mixer.music.stop()
+# Evento que manda el mezclador cada vez que termina una cancion
+FIN_CANCION = pygame.USEREVENT + 1
+
+
+def reproducir(playlist, repetir=False):
+    """Reproduce la lista sin huecos: la siguiente cancion siempre queda en cola.
+
+    Se espera al evento de fin de cancion (sin sondear), asi que cada
+    archivo suena completo sin importar cuanto dure.
+    """
+    pygame.display.init()  # la cola de eventos necesita el subsistema de video
+    pygame.mixer.init()
+    pygame.event.set_blocked(None)
+    pygame.event.set_allowed([FIN_CANCION, pygame.QUIT])
+    # bloquear no borra lo que ya estaba en cola (p. ej. AUDIODEVICEADDED del init)
+    pygame.event.clear()
+    pygame.mixer.music.set_endevent(FIN_CANCION)
+
+    def siguiente(indice):
+        if indice < len(playlist):
+            return indice
+        return 0 if repetir else None
+
+    def abrirDesde(indice, abrir):
+        """Abre con `abrir` la primera cancion que se pueda desde indice; devuelve cual o None."""
+        indice = siguiente(indice)
+        # como mucho una vuelta: con --repetir y ningun archivo valido no se queda girando
+        for _ in range(len(playlist)):
+            if indice is None:
+                return None
+            try:
+                abrir(playlist[indice])
+                return indice
+            except pygame.error as error:
+                print(f"Se salta {playlist[indice]}: {error}")
+            indice = siguiente(indice + 1)
+        return None
+
+    def empezar(archivo):
+        pygame.mixer.music.load(archivo)
+        pygame.mixer.music.play()
+
+    actual = abrirDesde(0, empezar)
+    if actual is None:
+        print("No hay ninguna cancion que se pueda reproducir")
+        pygame.quit()
+        return
+    print(f"Reproduciendo {playlist[actual]}")
+    en_cola = abrirDesde(actual + 1, pygame.mixer.music.queue)
+
+    try:
+        while True:
+            evento = pygame.event.wait()
+            if evento.type == pygame.QUIT:
+                break
+            if evento.type != FIN_CANCION:
+                continue
+            # Termino una cancion: si habia otra en cola ya esta sonando
+            if en_cola is None:
+                break
+            actual = en_cola
+            print(f"Reproduciendo {playlist[actual]}")
+            en_cola = abrirDesde(actual + 1, pygame.mixer.music.queue)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pygame.mixer.music.stop()
+        pygame.quit()
+
 
+if __name__ == "__main__":
+    argumentos = sys.argv[1:]
+    repetir = "--repetir" in argumentos
+    playlist = [a for a in argumentos if a != "--repetir"] or ["a.wav"]
+    reproducir(playlist, repetir)
@@ -0,0 +1,78 @@
+"""Compara los metodos de primalidad de numPrimos segun el tamano del numero.
+
+Para cada magnitud (10**3 .. 10**38) toma numeros impares al azar de esa
+cantidad de digitos y mide el tiempo promedio de:
+
+    division   division de prueba hasta la raiz (solo si son pocas divisiones)
+    criba      Criba.is_prime (solo por debajo de su maximo)
+    miller     primalidad.is_prime
+    factores   primalidad.factorize (solo hasta --max-factores bits)
+
+    python benchmarkPrimos.py
+    python benchmarkPrimos.py --muestras 50 --max-division 1000000
+"""
+import argparse
+import random
+import time
+
+from criba import Criba
+from primalidad import factorize, is_prime
+
+
+def porDivision(numero):
+    if numero < 2:
+        return False
+    for divisor in range(2, int(numero ** 0.5) + 1):
+        if numero % divisor == 0:
+            return False
+    return True
+
+
+def medir(funcion, numeros):
+    """Segundos promedio por numero."""
+    inicio = time.perf_counter()
+    for numero in numeros:
+        funcion(numero)
+    return (time.perf_counter() - inicio) / len(numeros)
+
+
+def _formato(segundos):
+    if segundos is None:
+        return "-"
+    if segundos < 1e-3:
+        return f"{segundos * 1e6:.1f} us"
+    if segundos < 1:
+        return f"{segundos * 1e3:.2f} ms"
+    return f"{segundos:.2f} s"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempos de los metodos de primalidad por magnitud.")
+    parser.add_argument("--muestras", type=int, default=20, help="numeros por magnitud")
+    parser.add_argument("--digitos", type=int, nargs="+", default=[3, 6, 9, 12, 15, 19, 25, 38])
+    parser.add_argument("--max-division", type=int, default=10 ** 6,
+                        help="divisiones como maximo para probar la division de prueba")
+    parser.add_argument("--max-factores", type=int, default=80, help="bits como maximo para factorizar")
+    parser.add_argument("--semilla", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.semilla)
+    criba = Criba()
+    print(f"{'digitos':>7} {'division':>10} {'criba':>10} {'miller':>10} {'factores':>10}")
+    for digitos in args.digitos:
+        numeros = [rng.randrange(10 ** (digitos - 1), 10 ** digitos) | 1 for _ in range(args.muestras)]
+        mayor = max(numeros)
+        if mayor < criba.maximo:
+            criba.is_prime(mayor)  # que no se mida el crecimiento de la criba, solo la consulta
+        tiempos = [
+            medir(porDivision, numeros) if mayor ** 0.5 <= args.max_division else None,
+            medir(criba.is_prime, numeros) if mayor < criba.maximo else None,
+            medir(is_prime, numeros),
+            medir(factorize, numeros) if mayor.bit_length() <= args.max_factores else None,
+        ]
+        print(f"{digitos:>7} " + " ".join(f"{_formato(tiempo):>10}" for tiempo in tiempos), flush=True)
+    criba.cerrar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""Criba de Eratostenes segmentada, guardada como bits en un archivo mapeado.
+
+Solo se guardan los impares: el bit i dice si 2*i + 1 es primo, asi que
+cada byte cubre 16 numeros. La criba crece sola (por segmentos) cuando una
+consulta pasa de donde llega, y vive en un archivo con np.memmap, de modo
+que la siguiente ejecucion empieza con lo que ya se habia cribado.
+
+    criba = Criba()
+    criba.is_prime(97)            # True
+    criba.primes_in_range(10, 30) # array([11, 13, 17, 19, 23, 29])
+    criba.next_prime(100)         # 101
+    criba.pi(1000)                # 168
+"""
+import os
+import struct
+
+import numpy as np
+
+MAGIA = b"CRIBA1\0\0"
+CABECERA = struct.Struct("<8sQ")  # magia y cuantos impares estan cribados
+SEGMENTO = 1 << 23  # impares por segmento al cribar (multiplo de 8)
+INICIAL = 1 << 16
+BLOQUE_CONTEO = 1 << 16  # bytes por bloque del indice de pi(n)
+MAXIMO = 1 << 32  # numeros que puede cubrir por defecto (un archivo de 256 MB)
+
+RUTA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "criba.bin")
+
+# cuantos bits en 1 tiene cada byte
+_BITS = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+class Criba:
+    def __init__(self, ruta=RUTA, maximo=MAXIMO):
+        self.ruta = ruta
+        self.maximo = maximo
+        self.limite = 0  # impares cribados: cubre los numeros menores que 2 * limite
+        self.bits = np.zeros(0, dtype=np.uint8)
+        self._conteos = np.zeros(1, dtype=np.int64)  # primos impares antes de cada bloque
+
+        if os.path.exists(ruta) and os.path.getsize(ruta) >= CABECERA.size:
+            with open(ruta, "rb") as f:
+                magia, limite = CABECERA.unpack(f.read(CABECERA.size))
+            if magia == MAGIA and os.path.getsize(ruta) >= CABECERA.size + limite // 8:
+                self.limite = limite
+                self._mapear()
+                self._actualizarConteos(0)
+        if not self.limite:
+            with open(ruta, "wb") as f:
+                f.write(CABECERA.pack(MAGIA, 0))
+            self._crecer(INICIAL)
+
+    def _mapear(self):
+        if self.limite:
+            self.bits = np.memmap(self.ruta, dtype=np.uint8, mode="r+",
+                                  offset=CABECERA.size, shape=(self.limite // 8,))
+
+    def _crecer(self, impares):
+        """Criba hasta cubrir al menos `impares` impares."""
+        nuevo = max(impares, min(2 * self.limite, self.maximo // 2))
+        nuevo = -(-nuevo // 8) * 8
+        if nuevo <= self.limite:
+            return
+        # los primos base (hasta la raiz del nuevo limite) tienen que estar cribados antes
+        raiz = int((2 * nuevo) ** 0.5) + 1
+        if raiz // 2 + 1 > self.limite and self.limite:
+            self._crecer(raiz // 2 + 1)
+        anterior = self.limite
+
+        if isinstance(self.bits, np.memmap):
+            self.bits.flush()
+        self.bits = np.zeros(0, dtype=np.uint8)  # soltar el mapeo antes de agrandar el archivo
+        with open(self.ruta, "r+b") as f:
+            f.truncate(CABECERA.size + nuevo // 8)
+        self.limite = nuevo
+        self._mapear()
+
+        if anterior == 0:
+            # el primer segmento se criba solo (sus primos base estan en el mismo)
+            self._cribarInicial(nuevo)
+        else:
+            base = self.primes_in_range(3, raiz, _crecer=False)
+            for inicio in range(anterior, nuevo, SEGMENTO):
+                self._cribarSegmento(inicio, min(inicio + SEGMENTO, nuevo), base)
+        self.bits.flush()
+        # la cabecera se actualiza al final: si se corta antes, se vuelve a cribar
+        with open(self.ruta, "r+b") as f:
+            f.write(CABECERA.pack(MAGIA, nuevo))
+        self._actualizarConteos(anterior // 8)
+
+    def _cribarInicial(self, impares):
+        es_primo = np.ones(impares, dtype=bool)
+        es_primo[0] = False  # el 1
+        for i in range(1, int((2 * impares) ** 0.5) // 2 + 1):
+            if es_primo[i]:
+                p = 2 * i + 1
+                es_primo[(p * p) // 2::p] = False
+        self.bits[:] = np.packbits(es_primo, bitorder="little")
+
+    def _cribarSegmento(self, inicio, fin, base):
+        """Criba los impares de indice [inicio, fin) con los primos impares de base."""
+        es_primo = np.ones(fin - inicio, dtype=bool)
+        primero = 2 * inicio + 1
+        ultimo = 2 * fin - 1
+        for p in base[base * base <= ultimo].tolist():
+            multiplo = max(p * p, -(-primero // p) * p)
+            if multiplo % 2 == 0:
+                multiplo += p
+            es_primo[(multiplo - primero) // 2::p] = False
+        self.bits[inicio // 8:fin // 8] = np.packbits(es_primo, bitorder="little")
+
+    def _actualizarConteos(self, desde_byte):
+        # cuentas acumuladas por bloque; solo se agregan los bloques nuevos
+        bloques_completos = len(self.bits) // BLOQUE_CONTEO
+        hechos = min(len(self._conteos) - 1, desde_byte // BLOQUE_CONTEO)
+        if bloques_completos <= hechos:
+            return
+        cuentas = _BITS[self.bits[hechos * BLOQUE_CONTEO:bloques_completos * BLOQUE_CONTEO]]
+        cuentas = cuentas.reshape(-1, BLOQUE_CONTEO).sum(axis=1, dtype=np.int64)
+        self._conteos = np.concatenate(
+            (self._conteos[:hechos + 1], self._conteos[hechos] + np.cumsum(cuentas)))
+
+    def _asegurar(self, n):
+        """Criba hasta poder responder por n (n incluido)."""
+        if n >= 2 * self.limite:
+            if n >= self.maximo:
+                raise ValueError(f"{n} esta fuera del alcance de la criba ({self.maximo})")
+            self._crecer(n // 2 + 1)
+
+    def _bit(self, indices):
+        return (self.bits[indices >> 3] >> (indices & 7).astype(np.uint8)) & 1
+
+    def is_prime(self, n):
+        if n < 3:
+            return n == 2
+        if n % 2 == 0:
+            return False
+        self._asegurar(n)
+        return bool(self._bit(np.int64(n // 2)))
+
+    def is_prime_many(self, numeros):
+        """Arreglo de booleanos para un arreglo de enteros no negativos."""
+        numeros = np.asarray(numeros, dtype=np.int64)
+        if not numeros.size:
+            return np.zeros(numeros.shape, dtype=bool)
+        self._asegurar(int(numeros.max()))
+        resultado = self._bit(np.maximum(numeros, 0) // 2).astype(bool) & (numeros % 2 == 1)
+        return (resultado & (numeros > 0)) | (numeros == 2)
+
+    def primes_in_range(self, desde, hasta, _crecer=True):
+        """Primos p con desde <= p < hasta, como arreglo de NumPy."""
+        desde = max(desde, 0)
+        if hasta <= desde:
+            return np.zeros(0, dtype=np.int64)
+        if _crecer:
+            self._asegurar(hasta - 1)
+        primero = desde // 2
+        ultimo = hasta // 2  # indice que le sigue al del ultimo impar < hasta
+        byte_inicial = primero // 8
+        bits = np.unpackbits(self.bits[byte_inicial:-(-ultimo // 8)], bitorder="little")
+        indices = np.flatnonzero(bits[primero - 8 * byte_inicial:ultimo - 8 * byte_inicial])
+        primos = 2 * (indices + primero).astype(np.int64) + 1
+        if desde <= 2 < hasta:
+            primos = np.concatenate(([2], primos))
+        return primos
+
+    def next_prime(self, n):
+        """El menor primo mayor que n."""
+        if n < 2:
+            return 2
+        ventana = 1 << 12
+        desde = n + 1
+        while True:
+            primos = self.primes_in_range(desde, desde + ventana)
+            if len(primos):
+                return int(primos[0])
+            desde += ventana
+            ventana *= 2
+
+    def pi(self, n):
+        """Cuantos primos hay menores o iguales que n."""
+        if n < 2:
+            return 0
+        self._asegurar(n)
+        impares = (n + 1) // 2  # indices 0 .. impares-1 son los impares <= n
+        byte_final, resto = divmod(impares, 8)
+        bloque = min(byte_final // BLOQUE_CONTEO, len(self._conteos) - 1)
+        total = int(self._conteos[bloque])
+        total += int(_BITS[self.bits[bloque * BLOQUE_CONTEO:byte_final]].sum(dtype=np.int64))
+        if resto:
+            total += bin(int(self.bits[byte_final]) & ((1 << resto) - 1)).count("1")
+        return total + 1  # el 2
+
+    def cerrar(self):
+        if isinstance(self.bits, np.memmap):
+            self.bits.flush()
+        self.bits = np.zeros(0, dtype=np.uint8)
@@ -1,3 +1,16 @@
+from criba import Criba
+from primalidad import LIMITE_DETERMINISTA, factorize, is_prime
+
+# la criba solo se agranda para numeros menores que esto (unos 40 ms y 1 MB); mas arriba
+# responde lo que ya este cribado y el resto va a Miller-Rabin, que tarda microsegundos
+LIMITE_CRIBA = 1 << 24
+
+# los compuestos mas chicos que esto se muestran con sus factores (Pollard-rho tarda poco hasta 64 bits)
+LIMITE_FACTORES = 1 << 64
+
+# la criba guarda en criba.bin lo que ya calculo, asi las siguientes veces responde al instante
+criba = Criba()
+
 # ciclo while debido a la complejidad de este sencillo codigo, tenemos que usar tambien ciclo for e incluso varios if
 # se abre el ciclo y antes del try se agrega un if para salir del codigo con break y tambien recolectamos el numero
 while True:
@@ -14,19 +27,22 @@ while True:
         if numero <= 1:
             print(f"El numero {numero} no es primo")
             continue
-        # la variable primo se crea y es un booleano creo y si es primo sera True 
-        primo = True
-        # se crea la variable divisor que se traduce a que el divisor estan en el rango entre 2 y el int raiz cuadrada del numero + 1 (porque el rango
-        # siempre resta uno en el segundo valor)
-        for divisor in range(2, int(numero ** 0.5) + 1):
-            # si el residuo del numero dividido en el divisor es igual a 0 entonces el numero no es primo ya que primo retorna False 
-            if numero % divisor == 0:
-                primo = False
-                # por que se hace break? estoy , supongo que es para cerrar el ciclo for e if 
-                break 
-        # imprimir dependiendo de el resultado anterior si es primo o no    
-        if primo:
-            print(f"El numero {numero} es primo")
+        # si ya esta cribado (o la criba crece poco) basta con mirar su bit
+        if numero < max(2 * criba.limite, LIMITE_CRIBA):
+            if criba.is_prime(numero):
+                print(f"El numero {numero} es primo")
+            else:
+                print(f"el numero {numero} no es primo")
+            continue
+        # mas alla de la criba, Miller-Rabin (exacto hasta LIMITE_DETERMINISTA, luego probabilistico)
+        if is_prime(numero):
+            if numero < LIMITE_DETERMINISTA:
+                print(f"El numero {numero} es primo")
+            else:
+                print(f"El numero {numero} es probablemente primo")
+        elif numero < LIMITE_FACTORES:
+            factores = " x ".join(str(factor) for factor in factorize(numero))
+            print(f"el numero {numero} no es primo ({factores})")
         else:
             print(f"el numero {numero} no es primo")
     # de otro modo a de haber un valor incorrecto en el numero ingresado        
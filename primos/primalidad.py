@@ -0,0 +1,120 @@
+"""Primalidad y factorizacion para enteros grandes.
+
+is_prime usa Miller-Rabin: con los primeros 12 primos como testigos el
+resultado es exacto para todo n < 3.18 * 10**23 (en particular para 64
+bits); por encima se agregan testigos al azar y el resultado es
+"probablemente primo" con error menor que 4**-rondas. factorize separa
+primero los factores chicos por division y despues parte lo que queda con
+el rho de Pollard en la variante de Brent.
+
+    is_prime(2**61 - 1)          # True
+    factorize(2**64 + 1)         # [274177, 67280421310721]
+"""
+import math
+import random
+
+import numpy as np
+
+# con estos testigos Miller-Rabin no se equivoca para n < LIMITE_DETERMINISTA
+TESTIGOS = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37)
+LIMITE_DETERMINISTA = 318665857834031151167461
+RONDAS = 20
+
+LIMITE_DIVISION = 1 << 12
+
+
+def _primosChicos(limite):
+    es_primo = np.ones(limite, dtype=bool)
+    es_primo[:2] = False
+    for i in range(2, int(limite ** 0.5) + 1):
+        if es_primo[i]:
+            es_primo[i * i::i] = False
+    return np.flatnonzero(es_primo).tolist()
+
+
+PRIMOS_CHICOS = _primosChicos(LIMITE_DIVISION)
+
+
+def _esTestigo(a, n, d, s):
+    """True si a demuestra que n es compuesto (n - 1 = d * 2**s, d impar)."""
+    x = pow(a, d, n)
+    if x == 1 or x == n - 1:
+        return False
+    for _ in range(s - 1):
+        x = x * x % n
+        if x == n - 1:
+            return False
+    return True
+
+
+def is_prime(n, rondas=RONDAS, rng=None):
+    """Miller-Rabin: exacto por debajo de LIMITE_DETERMINISTA, probabilistico arriba."""
+    if n < 2:
+        return False
+    for p in PRIMOS_CHICOS[:64]:
+        if n % p == 0:
+            return n == p
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    if any(_esTestigo(a, n, d, s) for a in TESTIGOS):
+        return False
+    if n < LIMITE_DETERMINISTA:
+        return True
+    rng = rng or random.Random()
+    return not any(_esTestigo(rng.randrange(2, n - 1), n, d, s) for _ in range(rondas))
+
+
+def pollard_brent(n, rng=None):
+    """Un divisor no trivial de n (compuesto e impar) con el rho de Pollard-Brent."""
+    rng = rng or random.Random()
+    while True:
+        y, c, m = rng.randrange(1, n), rng.randrange(1, n), 128
+        g = r = q = 1
+        while g == 1:
+            x = y
+            for _ in range(r):
+                y = (y * y + c) % n
+            k = 0
+            while k < r and g == 1:
+                guardado = y
+                # se multiplican m diferencias y se hace un solo gcd
+                for _ in range(min(m, r - k)):
+                    y = (y * y + c) % n
+                    q = q * abs(x - y) % n
+                g = math.gcd(q, n)
+                k += m
+            r *= 2
+        if g == n:
+            # el lote se paso de largo: repetir paso a paso desde el ultimo guardado
+            g = 1
+            while g == 1:
+                guardado = (guardado * guardado + c) % n
+                g = math.gcd(abs(x - guardado), n)
+        if g != n:
+            return g
+        # ciclo sin divisor: probar con otra constante
+
+
+def factorize(n, rng=None):
+    """Factores primos de n (n >= 1) en orden, con repeticion."""
+    if n < 1:
+        raise ValueError("solo se factorizan enteros positivos")
+    factores = []
+    for p in PRIMOS_CHICOS:
+        if p * p > n:
+            break
+        while n % p == 0:
+            factores.append(p)
+            n //= p
+    pendientes = [n] if n > 1 else []
+    while pendientes:
+        m = pendientes.pop()
+        if m < LIMITE_DIVISION ** 2 or is_prime(m, rng=rng):
+            # sin divisores chicos, por debajo de LIMITE_DIVISION**2 ya es primo
+            factores.append(m)
+        else:
+            divisor = pollard_brent(m, rng)
+            pendientes += [divisor, m // divisor]
+    return sorted(factores)